@@ -0,0 +1,8 @@
+from .simulation import run, run_simulation, run_batch
+from .data.result import COLUMN_NAMES
+from .data.cache import ResultCache
+from .environment.controlled import ControlledEnvironment
+from .version import ENGINE_VERSION
+
+__all__ = ["run", "run_simulation", "run_batch", "COLUMN_NAMES", "ResultCache", "ControlledEnvironment",
+           "ENGINE_VERSION"]
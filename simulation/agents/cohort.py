@@ -0,0 +1,110 @@
+import numpy as np
+
+from ..random_variable.random_variable import survival
+
+class SterileCohorts:
+    """
+    Released sterile males tracked as per-patch counts, one cohort per release.
+
+    Each released male behaves like an independent sterile ``Adult``: it dies once its age exceeds a lifespan
+    drawn from the configured distribution, or from the distribution of its release, and migrates following the
+    migration matrix. The counts are therefore advanced with binomial draws, so the cost of a step does not depend on
+    the number of released mosquitoes.
+
+    :param migration_rates: Migration matrix, row ``i`` holds the probabilities of leaving patch ``i``.
+    :type migration_rates: list of list of float
+    :param lifespan_dist: Distribution parameters for the sterile male lifespan.
+    :type lifespan_dist: dict
+    :param replicates: Number of independent replicates tracked together, defaults to None (a single one).
+    :type replicates: int, optional
+    """
+
+    def __init__(self, migration_rates, lifespan_dist, replicates=None):
+        """
+        Constructor.
+
+        :param migration_rates: Migration matrix, row ``i`` holds the probabilities of leaving patch ``i``.
+        :type migration_rates: list of list of float
+        :param lifespan_dist: Distribution parameters for the sterile male lifespan.
+        :type lifespan_dist: dict
+        :param replicates: Number of independent replicates tracked together, defaults to None (a single one).
+        :type replicates: int, optional
+        """
+        migration_rates = np.asarray(migration_rates, dtype=float)
+        tail = np.cumsum(migration_rates[:, ::-1], axis=1)[:, ::-1]
+        self.__N = migration_rates.shape[0]
+        # Conditional probabilities of going to patch j knowing the mosquito did not go to any patch before j.
+        self.__conditional_rates = np.divide(migration_rates, tail, out=np.zeros_like(migration_rates), where=tail > 0)
+        self.__conditional_rates[:, -1] = 1
+        self.__shape = (self.__N,) if replicates is None else (replicates, self.__N)
+        self.__counts = np.zeros((0,) + self.__shape, dtype=np.int64)
+        self.__ages = np.zeros(0)
+        self.__survival = np.zeros(0)
+        # Lifespan distributions of the cohorts, as indices in the list of distributions.
+        self.__lifespan_dists = [lifespan_dist]
+        self.__lifespans = np.zeros(0, dtype=np.int64)
+
+    def add(self, numbers, age, lifespan_dist=None):
+        """
+        Add a new cohort of sterile males.
+
+        :param numbers: Number of released males in each patch, the same for every replicate or one row per replicate.
+        :type numbers: np.ndarray
+        :param age: Age of the released males.
+        :type age: float
+        :param lifespan_dist: Distribution parameters for the lifespan of the released males, defaults to None (the
+                              one of the constructor).
+        :type lifespan_dist: dict, optional
+        """
+        numbers = np.asarray(numbers, dtype=np.int64)
+        if not numbers.any():
+            return
+        if lifespan_dist is None:
+            lifespan_dist = self.__lifespan_dists[0]
+        if lifespan_dist not in self.__lifespan_dists:
+            self.__lifespan_dists.append(lifespan_dist)
+        self.__counts = np.concatenate([self.__counts, np.broadcast_to(numbers, self.__shape)[None]])
+        self.__ages = np.append(self.__ages, age)
+        self.__survival = np.append(self.__survival, 1.)
+        self.__lifespans = np.append(self.__lifespans, self.__lifespan_dists.index(lifespan_dist))
+
+    def grow_old(self, dt):
+        """
+        Age every cohort by a given time increment, then make the survivors migrate.
+
+        :param dt: The time increment.
+        :type dt: int
+        """
+        if not len(self.__ages):
+            return
+        self.__ages += dt
+        new_survival = np.zeros_like(self.__ages)
+        for j, lifespan_dist in enumerate(self.__lifespan_dists):
+            cohorts = self.__lifespans == j
+            if cohorts.any():
+                new_survival[cohorts] = survival(lifespan_dist["dist"], lifespan_dist["params"], self.__ages[cohorts])
+        p = np.divide(new_survival, self.__survival, out=np.zeros_like(new_survival), where=self.__survival > 0)
+        self.__survival = new_survival
+        p = np.clip(p, 0, 1).reshape((-1,) + (1,) * len(self.__shape))
+        remaining = np.random.binomial(self.__counts, p)
+
+        counts = np.zeros_like(remaining)
+        for j in range(self.__N):
+            moved = np.random.binomial(remaining, self.__conditional_rates[:, j])
+            remaining -= moved
+            counts[..., j] = moved.sum(axis=-1)
+
+        alive = counts.reshape(len(counts), -1).any(axis=1)
+        self.__counts = counts[alive]
+        self.__ages = self.__ages[alive]
+        self.__survival = self.__survival[alive]
+        self.__lifespans = self.__lifespans[alive]
+
+    def get_numbers(self):
+        """
+        Get the number of released sterile males alive in each patch.
+
+        :return: Number of sterile males per patch, with a leading replicate axis if there are several replicates.
+        :rtype: np.ndarray
+        """
+        return self.__counts.sum(axis=0)
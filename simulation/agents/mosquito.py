@@ -1,4 +1,4 @@
-from random_variable.random_variable import simulate
+from ..random_variable.random_variable import simulate
 
 # List of mosquito types based on stage, sex, fertility, and mating status.
 MOSQUITO_TYPE = ([(stage, male, 1, 0) for stage in ["Egg", "Larva", "Pupa"] for male in [1, 0]] +
@@ -250,13 +250,17 @@ class Adult(Mosquito):
     :type male: bool
     :param fertile: Boolean indicating if the adult is fertile.
     :type fertile: bool
+    :param mated: Boolean indicating if the adult is a mated female, defaults to False.
+    :type mated: bool, optional
     """
-    def __init__(self, patch, age, male, fertile, config):
+    def __init__(self, patch, age, male, fertile, config, mated=False):
         lifespan_key = ["female adult", "male adult", "sterile male adult"][male + (not fertile)]
-        super().__init__(patch, age, male, config[lifespan_key]["lifespan"], config["egg"]["survival_rate"], fertile=fertile)
+        super().__init__(patch, age, male, config[lifespan_key]["lifespan"], config["egg"]["survival_rate"], fertile=fertile, mated=mated)
         self.__cycle_number = 1
         self.__next_cycle = 0
         self.__config = config
+        if mated:
+            self.__next_cycle = age + simulate(config["female adult"]["first blood"]["dist"], config["female adult"]["first blood"]["params"])
 
     def grow_old(self, dt):
         """
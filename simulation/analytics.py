@@ -0,0 +1,180 @@
+import sys
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+if __package__ in (None, ""):
+    # Run as a script: make the package importable from the repository root.
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulation.data.control import Control
+from simulation.data.result import COLUMN_NAMES
+from simulation.data.metrics import (final_fertile_females, time_to_suppression, fertile_female_area,
+                                     released_per_suppressed_female)
+
+def patch_files(folder_name):
+    """
+    Get the CSV files of the patches of a result folder, as written by ``Result.write``.
+
+    :param folder_name: Result folder.
+    :type folder_name: str
+    :return: Names of the files, sorted by patch.
+    :rtype: list of str
+    """
+    names = [name for name in os.listdir(folder_name) if name.endswith(".csv") and name[:-4].isdigit()]
+    return sorted(names, key=lambda name: int(name[:-4]))
+
+def find_runs(folder_name):
+    """
+    Find the runs stored in a folder, either result folders (one CSV file per patch, as written by ``Result.write``)
+    or ``.npy`` files (as written by the sweeps).
+
+    :param folder_name: Folder of the runs, e.g. a dataset folder or the ``runs`` folder of a sweep.
+    :type folder_name: str
+    :return: Paths of the runs, sorted by name.
+    :rtype: list of str
+    """
+    runs = []
+    with os.scandir(folder_name) as it:
+        for entry in it:
+            if entry.is_dir() and patch_files(entry.path):
+                runs.append(entry.path)
+            elif entry.is_file() and entry.name.endswith(".npy"):
+                runs.append(entry.path)
+    return sorted(runs)
+
+def read_run(path):
+    """
+    Read the populations of a stored run.
+
+    :param path: Path of a result folder or of a ``.npy`` file.
+    :type path: str
+    :return: Populations of shape (N, nt, number of columns).
+    :rtype: np.ndarray
+    """
+    if path.endswith(".npy"):
+        return np.load(path)
+    return np.stack([pd.read_csv(f"{path}/{name}", usecols=COLUMN_NAMES)[COLUMN_NAMES].values
+                     for name in patch_files(path)])
+
+def total_releases(control, N):
+    """
+    Get the number of sterile males released in each patch by a control strategy, read like the simulations read
+    it but without checking it against the period of the runs.
+
+    :param control: Path to a control file, either a release event file or a matrix (see ``Control.read``), or the
+                    control matrix.
+    :type control: str or np.ndarray
+    :param N: Number of patches.
+    :type N: int
+    :return: Number of released sterile males per patch.
+    :rtype: np.ndarray
+    """
+    control_strategy = Control(N, np.inf, 1)
+    if isinstance(control, str):
+        control_strategy.read(control, validate=False)
+    else:
+        control_strategy.set(control, validate=False)
+    return control_strategy.get_total_releases()
+
+def read_released(path, N, control=None):
+    """
+    Get the number of sterile males released in each patch by a stored run.
+
+    :param path: Path of a result folder or of a ``.npy`` file.
+    :type path: str
+    :param N: Number of patches.
+    :type N: int
+    :param control: Control file or matrix used by the runs without their own ``control.csv``, defaults to None.
+    :type control: str or np.ndarray, optional
+    :return: Number of released sterile males per patch, NaN if the control is unknown.
+    :rtype: np.ndarray or float
+    """
+    if os.path.isdir(path) and os.path.exists(f"{path}/control.csv"):
+        return total_releases(f"{path}/control.csv", N)
+    if control is not None:
+        return total_releases(control, N)
+    return np.nan
+
+def iterate_runs(paths, chunk_size=256):
+    """
+    Load stored runs by chunks, each one as a single array.
+
+    :param paths: Paths of the runs, which must have the same number of patches and time steps.
+    :type paths: list of str
+    :param chunk_size: Maximum number of runs of a chunk, defaults to 256.
+    :type chunk_size: int, optional
+    :return: Paths and populations of shape (runs, N, nt, number of columns) of each chunk.
+    :rtype: Iterator[Tuple[list of str, np.ndarray]]
+    """
+    for start in range(0, len(paths), chunk_size):
+        chunk = paths[start:start + chunk_size]
+        runs = [read_run(path) for path in chunk]
+        if len({run.shape for run in runs}) > 1:
+            raise ValueError(f"The runs of {chunk[0]} to {chunk[-1]} do not have the same number of patches "
+                             f"and time steps")
+        yield chunk, np.stack(runs)
+
+def analyze(paths, dt=1, control=None, chunk_size=256, level=0.9):
+    """
+    Compute the SIT metrics of stored runs, one chunk of runs at a time so that memory does not depend on their
+    number.
+
+    The metrics are computed with array operations over the runs, patches and time steps of a chunk: the final
+    fertile females, the time to suppression (see ``data.metrics.time_to_suppression``), the area under the curve
+    of the fertile females, and the number of released sterile males per suppressed female.
+
+    :param paths: Paths of the runs, which must have the same number of patches and time steps.
+    :type paths: list of str
+    :param dt: Time step of the runs, defaults to 1.
+    :type dt: int, optional
+    :param control: Control file or matrix used by the runs without their own ``control.csv``, defaults to None.
+    :type control: str or np.ndarray, optional
+    :param chunk_size: Maximum number of runs loaded at once, defaults to 256.
+    :type chunk_size: int, optional
+    :param level: Reduction defining the suppression, defaults to 0.9.
+    :type level: float, optional
+    :return: Metrics of each run and patch.
+    :rtype: pd.DataFrame
+    """
+    frames = []
+    for chunk, values in iterate_runs(paths, chunk_size):
+        R, N = values.shape[:2]
+        released = np.array([np.broadcast_to(read_released(path, N, control), (N,)) for path in chunk], dtype=float)
+        metrics = {"final_fertile_females": final_fertile_females(values, dt),
+                   "time_to_suppression": time_to_suppression(values, dt, level),
+                   "fertile_female_area": fertile_female_area(values, dt),
+                   "released_per_suppressed_female": released_per_suppressed_female(values, released, dt)}
+        df = pd.DataFrame({name: metric.ravel() for name, metric in metrics.items()})
+        df.insert(0, "patch", np.tile(np.arange(N), R))
+        df.insert(0, "run", np.repeat([os.path.basename(path) for path in chunk], N))
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=["run", "patch", "final_fertile_females", "time_to_suppression",
+                                     "fertile_female_area", "released_per_suppressed_female"])
+    return pd.concat(frames, ignore_index=True)
+
+if __name__ == "__main__":
+    # Usage: python analytics.py <runs_folder> <output_file> [<dt>] [--control <control_file>] [--chunk <size>]
+    args = sys.argv[1:]
+    options = {}
+    for option in ["--control", "--chunk"]:
+        if option in args:
+            index = args.index(option)
+            options[option] = args[index + 1]
+            del args[index:index + 2]
+    runs_folder, output_file = args[:2]
+    dt = int(args[2]) if len(args) > 2 else 1
+    control = options.get("--control")
+    chunk_size = int(options.get("--chunk", 256))
+
+    tic = time.time()
+
+    metrics = analyze(find_runs(runs_folder), dt, control, chunk_size)
+    metrics.to_csv(output_file, index=False)
+    print(metrics.drop(columns="run").groupby("patch").mean())
+
+    toc = time.time()
+    print(toc - tic)
@@ -0,0 +1,223 @@
+import sys
+import os
+import copy
+import json
+import time
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+if __package__ in (None, ""):
+    # Run as a script: make the package importable from the repository root.
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulation.data.reading import read_config
+from simulation.data.result import COLUMN_NAMES
+from simulation.data.stopping import Predicate, read_stopping_rules
+from simulation.simulation import run
+from simulation.sweep import set_config_value
+
+os.environ["OPENBLAS_MAIN_FREE"] = "1"
+
+def read_observations(filename, dt):
+    """
+    Read observed counts from a CSV file with the columns "Time", "Patch" and some of ``data.result.COLUMN_NAMES``.
+
+    Missing counts are ignored.
+
+    :param filename: Path to the CSV file.
+    :type filename: str
+    :param dt: Time step.
+    :type dt: int
+    :return: Row of the result, patch, column and count of each observation, as four arrays.
+    :rtype: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+    """
+    df = pd.read_csv(filename)
+    df = df.melt(id_vars=["Time", "Patch"], value_vars=[name for name in COLUMN_NAMES if name in df],
+                 var_name="column", value_name="count").dropna()
+    rows = np.rint(df["Time"].values / dt).astype(int)
+    columns = np.array([COLUMN_NAMES.index(name) for name in df["column"]], dtype=int)
+    return rows, df["Patch"].values.astype(int), columns, df["count"].values.astype(float)
+
+def distance(values, observations):
+    """
+    Euclidean distance between simulated and observed counts, over the time steps already simulated.
+
+    As the distance only grows when more time steps are simulated, a simulation can be rejected as soon as it
+    exceeds the tolerance.
+
+    :param values: Populations of shape (N, t, number of columns), e.g. the rows of a result recorded so far.
+    :type values: np.ndarray
+    :param observations: Observations as returned by ``read_observations``.
+    :type observations: tuple of np.ndarray
+    :return: Distance.
+    :rtype: float
+    """
+    rows, patches, columns, counts = observations
+    simulated = rows < values.shape[1]
+    differences = values[patches[simulated], rows[simulated], columns[simulated]] - counts[simulated]
+    return float(np.sqrt(np.sum(differences ** 2)))
+
+def run_particle(args):
+    """
+    Simulate one parameter set and compute its distance to the observations.
+
+    The simulation is stopped as soon as its distance exceeds the tolerance.
+
+    :param args: Configuration, initial mosquitoes, control, parameters indexed by configuration path, seed,
+                 observations and tolerance.
+    :type args: tuple
+    :return: Distance, infinite if the simulation was stopped.
+    :rtype: float
+    """
+    config, init_mosquitoes, control, parameters, seed, observations, tolerance = args
+    config = copy.deepcopy(config)
+    for path, value in parameters.items():
+        set_config_value(config, path, value)
+    rejection = Predicate(lambda values: distance(values, observations) > tolerance, fill_value="nan")
+    values = run(config, init_mosquitoes, control, seed=seed,
+                 stopping_rules=[rejection] + read_stopping_rules(config)).values
+    result = distance(values, observations)
+    return result if np.isfinite(result) else np.inf
+
+def kernel_density(x, particles, weights, covariance):
+    """
+    Density of the perturbation kernel mixture, a Gaussian centered on each weighted particle.
+
+    :param x: Points of shape (n, d).
+    :type x: np.ndarray
+    :param particles: Particles of shape (m, d).
+    :type particles: np.ndarray
+    :param weights: Normalized weights of the particles.
+    :type weights: np.ndarray
+    :param covariance: Covariance of the kernel, of shape (d, d).
+    :type covariance: np.ndarray
+    :return: Density at each point, up to a constant factor.
+    :rtype: np.ndarray
+    """
+    precision = np.linalg.inv(covariance)
+    differences = x[:, None, :] - particles[None, :, :]
+    squared = np.einsum("nmi,ij,nmj->nm", differences, precision, differences)
+    return np.exp(-0.5 * squared) @ weights
+
+def run_calibration(config, init_mosquitoes, control, calibration, observations, folder_name, processes=None):
+    """
+    Calibrate configuration parameters against observed counts with sequential Monte Carlo ABC.
+
+    The calibration dictionary has the keys ``parameters`` (uniform prior range [low, high] of each calibrated
+    parameter, indexed by configuration path as in ``sweep.set_config_value``) and optionally ``particles``
+    (defaults to 100), ``generations`` (defaults to 5), ``quantile`` (defaults to 0.5), ``max_simulations`` (maximum
+    number of proposals of a generation, including the ones outside the prior that are not simulated, defaults to
+    100 times the particles) and ``seed``.
+
+    The first generation samples the prior. Each following generation takes as tolerance the ``quantile`` of the
+    distances of the previous one, and proposes particles of the previous generation perturbed by a Gaussian kernel
+    with twice their weighted covariance, until ``particles`` proposals are within the tolerance. Proposals are
+    simulated in parallel by batches, and each simulation stops as soon as its distance exceeds the tolerance. When
+    a generation reaches ``max_simulations`` proposals first, the tolerance is out of reach and the calibration
+    ends: the posterior is made of the particles accepted so far, or of the previous generation if there are none.
+
+    The folder contains ``posterior.csv``, the particles of the last generation with their weights and distances,
+    and ``generations.csv``, the tolerance, number of simulations, number of accepted particles, acceptance rate of
+    each generation, and whether it exhausted ``max_simulations``.
+
+    :param config: Configuration dictionary containing parameters for the simulation.
+    :type config: dict
+    :param init_mosquitoes: Path to the CSV file containing the initial mosquitoes, or their numbers.
+    :type init_mosquitoes: str or dict
+    :param control: Path to the CSV file containing the control strategy, or the control matrix.
+    :type control: str or np.ndarray
+    :param calibration: Description of the calibration.
+    :type calibration: dict
+    :param observations: Observations as returned by ``read_observations``.
+    :type observations: tuple of np.ndarray
+    :param folder_name: Name of the folder where the posterior is saved.
+    :type folder_name: str
+    :param processes: Number of worker processes, defaults to the number of CPUs.
+    :type processes: int, optional
+    :return: Weighted posterior sample, one row per particle with its parameters, "weight" and "distance".
+    :rtype: pd.DataFrame
+    """
+    names = list(calibration["parameters"])
+    low = np.array([calibration["parameters"][name][0] for name in names])
+    high = np.array([calibration["parameters"][name][1] for name in names])
+    n = calibration.get("particles", 100)
+    max_simulations = calibration.get("max_simulations", 100 * n)
+    rng = np.random.default_rng(calibration.get("seed"))
+
+    def simulate_batch(pool, thetas, tolerance):
+        seeds = rng.integers(2 ** 31, size=len(thetas))
+        jobs = [(config, init_mosquitoes, control, dict(zip(names, map(float, theta))), int(seed), observations,
+                 tolerance) for theta, seed in zip(thetas, seeds)]
+        return np.array(pool.map(run_particle, jobs))
+
+    generations = []
+    with Pool(processes) as pool:
+        particles = low + rng.random((n, len(names))) * (high - low)
+        distances = simulate_batch(pool, particles, np.inf)
+        weights = np.full(n, 1 / n)
+        generations.append({"generation": 0, "tolerance": np.inf, "simulations": n, "accepted": n,
+                            "acceptance_rate": 1., "exhausted": False})
+
+        for generation in range(1, calibration.get("generations", 5)):
+            tolerance = float(np.quantile(distances, calibration.get("quantile", 0.5)))
+            covariance = 2 * np.atleast_2d(np.cov(particles, rowvar=False, aweights=weights))
+            covariance += 1e-12 * np.eye(len(names))
+            accepted = []
+            accepted_distances = []
+            simulations = 0
+            proposed = 0
+            while len(accepted) < n and proposed < max_simulations:
+                parents = particles[rng.choice(len(particles), size=n, p=weights)]
+                proposals = parents + rng.multivariate_normal(np.zeros(len(names)), covariance, size=n)
+                proposals = proposals[:max_simulations - proposed]
+                proposed += len(proposals)
+                proposals = proposals[((proposals >= low) & (proposals <= high)).all(axis=1)]
+                if not len(proposals):
+                    continue
+                proposal_distances = simulate_batch(pool, proposals, tolerance)
+                simulations += len(proposals)
+                keep = proposal_distances <= tolerance
+                accepted.extend(proposals[keep])
+                accepted_distances.extend(proposal_distances[keep])
+
+            exhausted = len(accepted) < n
+            generations.append({"generation": generation, "tolerance": tolerance, "simulations": simulations,
+                                "accepted": min(len(accepted), n),
+                                "acceptance_rate": len(accepted) / simulations if simulations else 0.,
+                                "exhausted": exhausted})
+            if accepted:
+                new_particles = np.array(accepted[:n])
+                # The prior is uniform, so the weights only depend on the kernel mixture.
+                new_weights = 1 / kernel_density(new_particles, particles, weights, covariance)
+                particles = new_particles
+                distances = np.array(accepted_distances[:n])
+                weights = new_weights / new_weights.sum()
+            if exhausted:
+                break
+
+    posterior = pd.DataFrame(particles, columns=names)
+    posterior["weight"] = weights
+    posterior["distance"] = distances
+    os.makedirs(folder_name, exist_ok=True)
+    posterior.to_csv(f"{folder_name}/posterior.csv", index=False)
+    pd.DataFrame(generations).to_csv(f"{folder_name}/generations.csv", index=False)
+    return posterior
+
+if __name__ == "__main__":
+    # Usage: python calibration.py <config_file> <init_mosquito_file> <control_file> <calibration_file>
+    #                              <observation_file> <folder_name> [<processes>]
+    config = read_config(sys.argv[1])
+    init_mosquito_file, control_file, calibration_file, observation_file, folder_name = sys.argv[2:7]
+    processes = int(sys.argv[7]) if len(sys.argv) > 7 else None
+    with open(calibration_file) as f:
+        calibration = json.load(f)
+    observations = read_observations(observation_file, config["dt"])
+
+    tic = time.time()
+
+    run_calibration(config, init_mosquito_file, control_file, calibration, observations, folder_name, processes)
+
+    toc = time.time()
+    print(toc - tic)
@@ -0,0 +1,120 @@
+import os
+import json
+import hashlib
+
+import numpy as np
+
+from ..version import ENGINE_VERSION
+from .control import Control
+from .reading import init_mosquitoes_frame
+
+class ResultCache:
+    """
+    On-disk cache of simulation results, addressed by a hash of all the inputs of the simulation.
+
+    Each result is saved in its own file. When the total size exceeds the limit, the least recently used results are
+    removed.
+
+    :param folder_name: Name of the folder where results are cached.
+    :type folder_name: str
+    :param max_size: Maximum total size of the cached results in bytes, defaults to 1 GiB.
+    :type max_size: int, optional
+    """
+
+    def __init__(self, folder_name, max_size=2**30):
+        """
+        Constructor.
+
+        :param folder_name: Name of the folder where results are cached.
+        :type folder_name: str
+        :param max_size: Maximum total size of the cached results in bytes, defaults to 1 GiB.
+        :type max_size: int, optional
+        """
+        self.__folder_name = folder_name
+        self.__max_size = max_size
+        os.makedirs(folder_name, exist_ok=True)
+
+    @staticmethod
+    def key(config, init_mosquitoes, control, seed):
+        """
+        Compute the key of a simulation from a canonical form of its inputs and the engine version.
+
+        :param config: Configuration dictionary containing parameters for the simulation.
+        :type config: dict
+        :param init_mosquitoes: Path to the CSV file containing the initial mosquitoes, or their numbers.
+        :type init_mosquitoes: str or dict or pd.DataFrame
+        :param control: Path to the CSV file containing the control strategy, the control matrix, or the control
+                        strategy itself. Its releases are part of the key, whatever the form they are given in.
+        :type control: str or np.ndarray or Control
+        :param seed: Seed of the random generators.
+        :type seed: int
+        :return: Hexadecimal key.
+        :rtype: str
+        """
+        init_mosquitoes = {name: [float(number) for number in numbers]
+                           for name, numbers in init_mosquitoes_frame(init_mosquitoes).items()}
+        control_strategy = Control.create(config["number_of_patches"], config["period"], config["dt"], control)
+
+        h = hashlib.sha256()
+        h.update(json.dumps({"engine": ENGINE_VERSION, "config": config, "init_mosquitoes": init_mosquitoes,
+                             "dt": config["dt"], "control": control_strategy.get_events(), "seed": int(seed)},
+                            sort_keys=True).encode())
+        return h.hexdigest()
+
+    def __path(self, key):
+        return f"{self.__folder_name}/{key}.npy"
+
+    def get(self, key):
+        """
+        Get a cached result and mark it as recently used.
+
+        :param key: Key of the simulation.
+        :type key: str
+        :return: Populations of the simulation, or None if it is not cached.
+        :rtype: np.ndarray or None
+        """
+        try:
+            values = np.load(self.__path(key))
+            os.utime(self.__path(key))
+        except (FileNotFoundError, ValueError, EOFError):
+            return None
+        return values
+
+    def put(self, key, values):
+        """
+        Cache a result, then remove the least recently used results if the cache is too large.
+
+        :param key: Key of the simulation.
+        :type key: str
+        :param values: Populations of the simulation.
+        :type values: np.ndarray
+        """
+        # Write then rename, so that concurrent readers never see a partial file.
+        tmp_path = f"{self.__path(key)}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, values)
+        os.replace(tmp_path, self.__path(key))
+        self.__evict()
+
+    def __evict(self):
+        """
+        Remove the least recently used results until the total size is below the limit.
+        """
+        entries = []
+        with os.scandir(self.__folder_name) as it:
+            for entry in it:
+                if entry.name.endswith(".npy") and entry.is_file():
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        size = sum(entry[1] for entry in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= self.__max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
@@ -1,3 +1,5 @@
+import json
+
 import numpy as np
 import pandas as pd
 
@@ -5,6 +7,11 @@ class Control:
     """
     This class represents a control strategy for adding mosquitoes to the environment.
 
+    The strategy is stored as sparse release events, each one releasing a number of sterile males in a patch at a
+    time, optionally with their own age and lifespan distribution instead of ``release_age`` and the configured
+    sterile male lifespan. The events are sorted by time, so the releases of a time step are found in
+    O(log(events) + events of the time step).
+
     :param N: Number of patches.
     :type N: int
     :param T: Total time period.
@@ -27,30 +34,254 @@ class Control:
         self.__N = N
         self.__T = T
         self.__dt = dt
-        self.__nt = int(T / dt) + 1
-        self.__control = np.zeros((self.__nt, N))
+        self.set_events(np.zeros(0), np.zeros(0, dtype=int), np.zeros(0))
 
-    def read(self, filename):
+    @classmethod
+    def create(cls, N, T, dt, control):
+        """
+        Get a control strategy from any of the forms the simulations accept.
+
+        :param N: Number of patches.
+        :type N: int
+        :param T: Total time period.
+        :type T: int
+        :param dt: Time step.
+        :type dt: int
+        :param control: Path to the CSV file containing the control strategy, the control matrix, or the control
+                        strategy itself.
+        :type control: str or np.ndarray or Control
+        :return: The control strategy.
+        :rtype: Control
+        """
+        if isinstance(control, cls):
+            return control
+        control_strategy = cls(N, T, dt)
+        if isinstance(control, str):
+            control_strategy.read(control)
+        else:
+            control_strategy.set(control)
+        return control_strategy
+
+    def read(self, filename, validate=True):
         """
         Read the control strategy from a CSV file.
 
+        The file is either a release event file, with the columns "Time", "Patch", "Count" and optionally "Age" and
+        "Lifespan" (a JSON distribution like the ones of the configuration), or a matrix with the column "Time" and
+        one column per patch.
+
         :param filename: Path to the CSV file containing the control strategy.
         :type filename: str
+        :param validate: Whether the releases are checked, see ``set_events``, defaults to True.
+        :type validate: bool, optional
+        """
+        df = pd.read_csv(filename)
+        if "Patch" in df and "Count" in df:
+            lifespans = None
+            if "Lifespan" in df:
+                lifespans = [json.loads(lifespan) if isinstance(lifespan, str) else None
+                             for lifespan in df["Lifespan"]]
+            self.set_events(df["Time"].values, df["Patch"].values, df["Count"].values,
+                            df["Age"].values if "Age" in df else None, lifespans, validate)
+        else:
+            df = df.set_index('Time')
+            times, patches = np.nonzero(df.values)
+            self.set_events(df.index.values[times], patches, df.values[times, patches], validate=validate)
+
+    def write(self, filename):
+        """
+        Save the control strategy to a release event file.
+
+        :param filename: Path to the CSV file.
+        :type filename: str
+        """
+        df = pd.DataFrame({"Time": self.__times, "Patch": self.__patches, "Count": self.__counts})
+        if not np.isnan(self.__ages).all():
+            df["Age"] = self.__ages
+        if (self.__lifespan_index >= 0).any():
+            df["Lifespan"] = [json.dumps(self.__lifespans[j]) if j >= 0 else None for j in self.__lifespan_index]
+        df.to_csv(filename, index=False)
+
+    def set(self, control, validate=True):
+        """
+        Set the control strategy from a matrix.
+
+        :param control: Number of mosquitoes to add, one row per time step and one column per patch, or a single row.
+        :type control: np.ndarray
+        :param validate: Whether the releases are checked, see ``set_events``, defaults to True.
+        :type validate: bool, optional
+        :raises ValueError: If the matrix does not have one column per patch, or a release is invalid (see
+                            ``set_events``).
+        """
+        control = np.asarray(control, dtype=float)
+        if control.ndim == 1 and len(control) == self.__N:
+            control = control[None]
+        if control.ndim != 2 or control.shape[1] != self.__N:
+            raise ValueError(f"The control matrix has shape {control.shape}, it should have {self.__N} columns, "
+                             f"one per patch")
+        steps, patches = np.nonzero(control)
+        self.set_events(steps * self.__dt, patches, control[steps, patches], validate=validate)
+
+    def set_events(self, times, patches, counts, ages=None, lifespans=None, validate=True):
+        """
+        Set the control strategy from release events.
+
+        :param times: Time of each release, a multiple of the time step within the period.
+        :type times: np.ndarray
+        :param patches: Patch of each release.
+        :type patches: np.ndarray
+        :param counts: Number of sterile males of each release, decimals are dropped.
+        :type counts: np.ndarray
+        :param ages: Age of the males of each release, NaN for ``release_age``, defaults to None (all of them).
+        :type ages: np.ndarray, optional
+        :param lifespans: Lifespan distribution of the males of each release, None for the configured one, defaults
+                          to None (all of them).
+        :type lifespans: list of dict, optional
+        :param validate: Whether the releases are checked, defaults to True. Without checks, the releases are only
+                         used for their numbers, e.g. to count the released males of a stored run.
+        :type validate: bool, optional
+        :raises ValueError: If a release is outside the period, between two time steps, outside the patches, or
+                            has a negative count or age.
+        """
+        times = np.asarray(times, dtype=float)
+        patches = np.asarray(patches)
+        counts = np.asarray(counts, dtype=float)
+        ages = np.full(len(times), np.nan) if ages is None else np.asarray(ages, dtype=float)
+        if lifespans is None:
+            lifespans = [None] * len(times)
+
+        steps = times / self.__dt
+        if validate:
+            errors = {"outside the period": (times < 0) | (times > self.__T),
+                      "between two time steps": ~np.isclose(steps, np.rint(steps)),
+                      "outside the patches": (patches < 0) | (patches >= self.__N) | (patches != np.rint(patches)),
+                      "with a negative count": ~(counts >= 0),
+                      "with a negative age": ages < 0}
+            for error, invalid in errors.items():
+                if invalid.any():
+                    rows = np.flatnonzero(invalid)
+                    raise ValueError(f"{len(rows)} releases {error}, e.g. the release {rows[0]} at time "
+                                     f"{times[rows[0]]} in patch {patches[rows[0]]}")
+
+        keys = [json.dumps(lifespan, sort_keys=True) if lifespan is not None else None for lifespan in lifespans]
+        unique = list(dict.fromkeys(key for key in keys if key is not None))
+        lifespan_index = np.array([unique.index(key) if key is not None else -1 for key in keys], dtype=int)
+
+        keep = counts.astype(int) > 0
+        order = np.argsort(steps[keep], kind="stable")
+        self.__steps = np.rint(steps[keep][order]).astype(int)
+        self.__times = self.__steps * self.__dt
+        self.__patches = patches[keep][order].astype(int)
+        self.__counts = counts[keep][order].astype(int)
+        self.__ages = ages[keep][order]
+        self.__lifespans = [json.loads(key) for key in unique]
+        self.__lifespan_index = lifespan_index[keep][order]
+
+    def window(self, time, period):
+        """
+        Get the releases of a time window, as a control strategy whose time 0 is the start of the window.
+
+        :param time: Start of the window, a multiple of the time step, possibly negative.
+        :type time: float
+        :param period: Length of the window, the period of the new control strategy.
+        :type period: float
+        :return: The control strategy of the window.
+        :rtype: Control
+        """
+        start = int(round(time / self.__dt))
+        steps = self.__steps - start
+        events = (steps >= 0) & (steps * self.__dt <= period)
+        lifespans = [self.__lifespans[j] if j >= 0 else None for j in self.__lifespan_index[events]]
+        control = Control(self.__N, period, self.__dt)
+        control.set_events(steps[events] * self.__dt, self.__patches[events], self.__counts[events],
+                           self.__ages[events], lifespans)
+        return control
+
+    @property
+    def release_age(self):
+        """
+        Get the age of the released sterile males.
+
+        :return: Age at release.
+        :rtype: int
+        """
+        return 10
+
+    def __find(self, time):
+        """
+        Find the events of the time step of a time.
+
+        :param time: The current time.
+        :type time: float
+        :return: Slice of the events.
+        :rtype: slice
+        """
+        step = int(round(time / self.__dt))
+        return slice(*np.searchsorted(self.__steps, [step, step + 1]))
+
+    def get_releases(self, time):
+        """
+        Get the number of sterile males to be released in each patch at a specific time based on the control strategy.
+
+        :param time: The current time.
+        :type time: int
+        :return: Number of sterile males to release per patch.
+        :rtype: np.ndarray
         """
-        self.__control = pd.read_csv(filename).set_index('Time').values
+        events = self.__find(time)
+        return np.bincount(self.__patches[events], weights=self.__counts[events], minlength=self.__N).astype(int)
 
-    def get_mosquitoes(self, time, mosquito_class, config):
+    def get_release_events(self, time):
         """
-        Get the list of mosquitoes to be added at a specific time based on the control strategy.
+        Get the releases of a specific time, grouped by age and lifespan distribution.
 
-        :param time: The current time step.
+        :param time: The current time.
         :type time: int
-        :param mosquito_class: The class of mosquitoes to be added.
-        :type mosquito_class: class
-        :return: List of mosquitoes to be added.
-        :rtype: List[Mosquito]
-        """
-        mosquitoes = []
-        for i in range(self.__N):
-            mosquitoes += [mosquito_class(i, 10, True, False, config) for _ in range(int(self.__control[time, i]))]
-        return mosquitoes
+        :return: Number of sterile males to release per patch, their age and their lifespan distribution (None for
+                 the configured one), for each group.
+        :rtype: List[Tuple[np.ndarray, float, Optional[dict]]]
+        """
+        groups = {}
+        events = self.__find(time)
+        for patch, count, age, lifespan in zip(self.__patches[events], self.__counts[events], self.__ages[events],
+                                               self.__lifespan_index[events]):
+            age = self.release_age if np.isnan(age) else float(age)
+            numbers = groups.setdefault((age, int(lifespan)), np.zeros(self.__N, dtype=int))
+            numbers[patch] += count
+        return [(numbers, age, self.__lifespans[lifespan] if lifespan >= 0 else None)
+                for (age, lifespan), numbers in groups.items()]
+
+    def get_events(self):
+        """
+        Get every release of the control strategy, in a canonical order.
+
+        :return: Time step, patch, number of sterile males, age (None for ``release_age``) and lifespan distribution
+                 (None for the configured one) of each release, sorted.
+        :rtype: List[Tuple[int, int, int, Optional[float], Optional[dict]]]
+        """
+        events = [(int(step), int(patch), int(count), None if np.isnan(age) else float(age),
+                   self.__lifespans[lifespan] if lifespan >= 0 else None)
+                  for step, patch, count, age, lifespan in zip(self.__steps, self.__patches, self.__counts,
+                                                               self.__ages, self.__lifespan_index)]
+        return sorted(events, key=lambda event: (event[:3], -1 if event[3] is None else event[3],
+                                                 json.dumps(event[4], sort_keys=True)))
+
+    def get_total_releases(self):
+        """
+        Get the number of sterile males released by the control strategy in each patch.
+
+        :return: Number of sterile males released over the period, per patch.
+        :rtype: np.ndarray
+        """
+        return np.bincount(self.__patches, weights=self.__counts, minlength=self.__N).astype(int)
+
+    def remaining_releases(self, time):
+        """
+        Check if sterile males are to be released from a specific time on.
+
+        :param time: The current time.
+        :type time: int
+        :return: True if there is at least one release from this time on.
+        :rtype: bool
+        """
+        return bool(len(self.__steps)) and self.__steps[-1] >= round(time / self.__dt)
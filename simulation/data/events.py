@@ -0,0 +1,228 @@
+import json
+import struct
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from ..agents.mosquito import MOSQUITO_NAME
+
+# First bytes of an event file.
+MAGIC = b"MOSQEVT1"
+
+# Stage changes of the mosquitoes, including the females becoming sterile or mated when they mate.
+TRANSITIONS = [("Male Egg", "Male Larva"), ("Female Egg", "Female Larva"), ("Male Larva", "Male Pupa"),
+               ("Female Larva", "Female Pupa"), ("Male Pupa", "Fertile Male Adult"),
+               ("Female Pupa", "Fertile Female Adult"), ("Fertile Female Adult", "Sterile Female Adult"),
+               ("Fertile Female Adult", "Mated Female Adult")]
+
+# Mosquitoes that migrate between patches.
+ADULT_NAMES = [name for name in MOSQUITO_NAME if name.endswith("Adult")]
+
+def event_names(N):
+    """
+    Names of the events counted in each patch at each time step.
+
+    An event is a birth ("Male Egg laid"), a death ("Larva died"), a transition ("Male Egg to Male Larva") or the
+    migration of an adult to another patch ("Mated Female Adult to patch 2"), counted in the patch where it happens
+    or, for migrations, in the patch of origin.
+
+    :param N: Number of patches.
+    :type N: int
+    :return: Names of the events.
+    :rtype: list of str
+    """
+    return ([f"{name} laid" for name in ["Male Egg", "Female Egg"]]
+            + [f"{name} died" for name in MOSQUITO_NAME]
+            + [f"{old} to {new}" for old, new in TRANSITIONS]
+            + [f"{name} to patch {j}" for name in ADULT_NAMES for j in range(N)])
+
+def encode(numbers):
+    """
+    Encode integers as zigzag variable-length integers, small values taking one byte whatever their sign.
+
+    :param numbers: Integers.
+    :type numbers: np.ndarray
+    :return: Encoded bytes.
+    :rtype: bytes
+    """
+    encoded = bytearray()
+    for number in numbers.tolist():
+        number = (number << 1) ^ (number >> 63)
+        while number >= 0x80:
+            encoded.append((number & 0x7F) | 0x80)
+            number >>= 7
+        encoded.append(number)
+    return bytes(encoded)
+
+def decode(data):
+    """
+    Decode zigzag variable-length integers.
+
+    :param data: Encoded bytes.
+    :type data: bytes
+    :return: Integers.
+    :rtype: np.ndarray
+    """
+    numbers = []
+    number = 0
+    shift = 0
+    for byte in data:
+        number |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            numbers.append((number >> 1) ^ -(number & 1))
+            number = 0
+            shift = 0
+    return np.array(numbers, dtype=np.int64)
+
+class EventLog:
+    """
+    Compact binary log of the events of a simulation, counted per time step and patch.
+
+    The file starts with ``MAGIC``, then the length and the JSON of a header holding the number of patches, the time
+    step, the event names and the initial populations of each mosquito type. It is followed by a zlib stream of the
+    counts of each time step, stored as the differences from the previous time step, zigzag variable-length encoded.
+
+    :param filename: Path of the event file.
+    :type filename: str
+    :param N: Number of patches.
+    :type N: int
+    :param dt: Time step.
+    :type dt: int
+    :param populations: Initial number of mosquitoes of each type, indexed like ``MOSQUITO_NAME``, in each patch.
+    :type populations: List[List[int]]
+    """
+
+    def __init__(self, filename, N, dt, populations):
+        """
+        Constructor.
+
+        :param filename: Path of the event file.
+        :type filename: str
+        :param N: Number of patches.
+        :type N: int
+        :param dt: Time step.
+        :type dt: int
+        :param populations: Initial number of mosquitoes of each type, indexed like ``MOSQUITO_NAME``, in each patch.
+        :type populations: List[List[int]]
+        """
+        names = event_names(N)
+        self.__index = {name: j for j, name in enumerate(names)}
+        self.__counts = np.zeros((N, len(names)), dtype=np.int64)
+        self.__previous = np.zeros_like(self.__counts)
+        self.__compressor = zlib.compressobj()
+        header = json.dumps({"N": N, "dt": dt, "events": names,
+                             "populations": np.asarray(populations, dtype=int).tolist()}).encode()
+        self.__file = open(filename, "wb")
+        self.__file.write(MAGIC + struct.pack("<I", len(header)) + header)
+
+    def add(self, patch, event, number=1):
+        """
+        Count events of the current time step.
+
+        :param patch: Patch where the events happen.
+        :type patch: int
+        :param event: Name of the event, see ``event_names``.
+        :type event: str
+        :param number: Number of events, defaults to 1.
+        :type number: int, optional
+        """
+        self.__counts[patch, self.__index[event]] += number
+
+    def next_step(self):
+        """
+        Write the counts of the current time step and start the next one.
+        """
+        delta = self.__counts - self.__previous
+        self.__file.write(self.__compressor.compress(encode(delta.ravel())))
+        self.__previous = self.__counts
+        self.__counts = np.zeros_like(self.__previous)
+
+    def close(self):
+        """
+        Flush and close the file.
+        """
+        self.__file.write(self.__compressor.flush())
+        self.__file.close()
+
+def read_events(filename):
+    """
+    Read an event file.
+
+    :param filename: Path of the event file.
+    :type filename: str
+    :return: Header of the file (see ``EventLog``) and counts of shape (number of time steps, N, number of events).
+    :rtype: Tuple[dict, np.ndarray]
+    """
+    with open(filename, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{filename} is not an event file")
+        length, = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(length))
+        deltas = decode(zlib.decompress(f.read()))
+    N = header["N"]
+    counts = np.cumsum(deltas.reshape(-1, N, len(header["events"])), axis=0)
+    return header, counts
+
+def replay_populations(header, counts):
+    """
+    Rebuild the number of mosquitoes of each type from the events.
+
+    Released sterile males are tracked as cohorts and are not part of the events, they are given by the results.
+
+    :param header: Header of the event file.
+    :type header: dict
+    :param counts: Counts of the events, as returned by ``read_events``.
+    :type counts: np.ndarray
+    :return: Populations of shape (number of time steps + 1, N, number of types), indexed like ``MOSQUITO_NAME``,
+             the first row being the initial populations.
+    :rtype: np.ndarray
+    """
+    N = header["N"]
+    events = header["events"]
+    # Effect of each event on each mosquito type, in the patch where it is counted.
+    effect = np.zeros((len(events), len(MOSQUITO_NAME)), dtype=np.int64)
+    for name in ["Male Egg", "Female Egg"]:
+        effect[events.index(f"{name} laid"), MOSQUITO_NAME.index(name)] = 1
+    for j, name in enumerate(MOSQUITO_NAME):
+        effect[events.index(f"{name} died"), j] = -1
+    for old, new in TRANSITIONS:
+        effect[events.index(f"{old} to {new}"), MOSQUITO_NAME.index(old)] = -1
+        effect[events.index(f"{old} to {new}"), MOSQUITO_NAME.index(new)] = 1
+    changes = counts @ effect
+    for name in ADULT_NAMES:
+        j = MOSQUITO_NAME.index(name)
+        flows = counts[:, :, [events.index(f"{name} to patch {k}") for k in range(N)]]
+        changes[:, :, j] += flows.sum(axis=1) - flows.sum(axis=2)
+    populations = np.asarray(header["populations"], dtype=np.int64)
+    return np.concatenate([populations[None], populations + np.cumsum(changes, axis=0)])
+
+def aggregate(header, counts, resolution=1, patches=None):
+    """
+    Aggregate the events by time intervals and optionally by groups of patches.
+
+    :param header: Header of the event file.
+    :type header: dict
+    :param counts: Counts of the events, as returned by ``read_events``.
+    :type counts: np.ndarray
+    :param resolution: Number of time steps of each interval, defaults to 1.
+    :type resolution: int, optional
+    :param patches: Patches summed together, defaults to None (each patch on its own).
+    :type patches: list of int, optional
+    :return: Number of each event in each interval (and patch), the index being the start time of the interval.
+    :rtype: pd.DataFrame
+    """
+    dt = header["dt"]
+    intervals = np.arange(len(counts)) // resolution
+    if patches is not None:
+        counts = counts[:, patches].sum(axis=1, keepdims=True)
+    frames = []
+    for i in range(counts.shape[1]):
+        df = pd.DataFrame(counts[:, i], columns=header["events"]).groupby(intervals).sum()
+        df.index = df.index * resolution * dt
+        df.index.name = "Time"
+        if patches is None:
+            df.insert(0, "Patch", i)
+        frames.append(df)
+    return pd.concat(frames)
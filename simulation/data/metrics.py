@@ -0,0 +1,78 @@
+import numpy as np
+
+from .result import COLUMN_NAMES, FERTILE_COLUMNS
+
+# Columns of the females that can still lay fertile eggs.
+FERTILE_FEMALE_COLUMNS = [COLUMN_NAMES.index("Fertile Female Adult"), COLUMN_NAMES.index("Mated Female Adult")]
+
+def final_fertile_females(values, dt=1):
+    """
+    Number of fertile females (unmated or mated with a fertile male) of each patch at the end of the period.
+
+    :param values: Populations of shape (..., N, nt, number of columns), e.g. ``Result.values``.
+    :type values: np.ndarray
+    :param dt: Time step, unused.
+    :type dt: int, optional
+    :return: Array of shape (..., N).
+    :rtype: np.ndarray
+    """
+    return values[..., -1, FERTILE_FEMALE_COLUMNS].sum(axis=-1)
+
+def time_to_suppression(values, dt=1, level=0.9):
+    """
+    First time at which the fertile wild population of each patch is reduced by ``level`` from its maximum so far.
+
+    Patches that are never suppressed, including the ones that never have any wild mosquito, get the time following
+    the end of the period.
+
+    :param values: Populations of shape (..., N, nt, number of columns), e.g. ``Result.values``.
+    :type values: np.ndarray
+    :param dt: Time step.
+    :type dt: int, optional
+    :param level: Reduction defining the suppression, defaults to 0.9.
+    :type level: float, optional
+    :return: Array of shape (..., N).
+    :rtype: np.ndarray
+    """
+    wild = values[..., FERTILE_COLUMNS].sum(axis=-1)
+    peak = np.maximum.accumulate(wild, axis=-1)
+    suppressed = (peak > 0) & (wild <= (1 - level) * peak)
+    nt = wild.shape[-1]
+    first = np.where(suppressed.any(axis=-1), suppressed.argmax(axis=-1), nt)
+    return dt * first
+
+def fertile_female_area(values, dt=1):
+    """
+    Area under the curve of the fertile females (unmated or mated with a fertile male) of each patch.
+
+    :param values: Populations of shape (..., N, nt, number of columns), e.g. ``Result.values``.
+    :type values: np.ndarray
+    :param dt: Time step.
+    :type dt: int, optional
+    :return: Array of shape (..., N), in female-days when the time unit is the day.
+    :rtype: np.ndarray
+    """
+    females = values[..., FERTILE_FEMALE_COLUMNS].sum(axis=-1)
+    return dt * (females.sum(axis=-1) - (females[..., 0] + females[..., -1]) / 2)
+
+def released_per_suppressed_female(values, released, dt=1):
+    """
+    Number of sterile males released in each patch for each fertile female removed from its peak to the end.
+
+    :param values: Populations of shape (..., N, nt, number of columns), e.g. ``Result.values``.
+    :type values: np.ndarray
+    :param released: Number of sterile males released in each patch over the period, of shape (..., N).
+    :type released: np.ndarray
+    :param dt: Time step, unused.
+    :type dt: int, optional
+    :return: Array of shape (..., N), NaN where the fertile females did not decrease from their peak.
+    :rtype: np.ndarray
+    """
+    females = values[..., FERTILE_FEMALE_COLUMNS].sum(axis=-1)
+    suppressed = females.max(axis=-1) - females[..., -1]
+    released = np.broadcast_to(np.asarray(released, dtype=float), suppressed.shape)
+    return np.divide(released, suppressed, out=np.full(suppressed.shape, np.nan), where=suppressed > 0)
+
+# Metrics available by name to the ensemble runner.
+METRICS = {"final_fertile_females": final_fertile_females, "time_to_suppression": time_to_suppression,
+           "fertile_female_area": fertile_female_area}
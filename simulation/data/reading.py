@@ -1,6 +1,11 @@
 import json
+
+import numpy as np
 import pandas as pd
 
+from ..agents import mosquito
+from .result import COLUMN_NAMES
+
 def read_config(filename):
     """
     Read the configuration from a JSON file.
@@ -28,13 +33,64 @@ def read_init_mosquitoes(filename, config):
     :return: List of mosquito objects.
     :rtype: List[Mosquito]
     """
-    import agents.mosquito
+    return create_init_mosquitoes(pd.read_csv(filename), config)
+
+def init_mosquitoes_frame(init_mosquitoes):
+    """
+    Get the initial numbers of mosquitoes as a table.
+
+    :param init_mosquitoes: Path to the CSV file containing the initial mosquitoes, or their numbers in each patch
+                            indexed by mosquito name.
+    :type init_mosquitoes: str or dict or pd.DataFrame
+    :return: Number of mosquitoes of each name (columns) in each patch (rows).
+    :rtype: pd.DataFrame
+    """
+    if isinstance(init_mosquitoes, str):
+        return pd.read_csv(init_mosquitoes)
+    return pd.DataFrame(init_mosquitoes)
+
+def create_init_mosquitoes(numbers_by_name, config):
+    """
+    Create the initial mosquito objects from their numbers.
+
+    Sterile male adults are not created, they are released as a cohort by the environment.
+
+    :param numbers_by_name: Number of mosquitoes in each patch, indexed by mosquito name.
+    :type numbers_by_name: pd.DataFrame or dict
+    :return: List of mosquito objects.
+    :rtype: List[Mosquito]
+    """
     mosquitoes = []
-    df = pd.read_csv(filename)
+    df = pd.DataFrame(numbers_by_name)
     for mosquito_name, numbers in df.items():
-        type = agents.mosquito.name_to_type(mosquito_name)
-        mosquito_class = getattr(agents.mosquito, type[0])
-        params = list(type[1:mosquito_class.__init__.__code__.co_argcount-2])
+        if mosquito_name == "Sterile Male Adult":
+            continue
+        stage, male, fertile, mated = mosquito.name_to_type(mosquito_name)
         for patch, number in enumerate(numbers):
-            mosquitoes += [mosquito_class(*([patch]+params+[config])) for _ in range(int(number))]
+            if stage == "Adult":
+                mosquitoes += [mosquito.Adult(patch, 0, bool(male), bool(fertile), config, mated=bool(mated))
+                               for _ in range(int(number))]
+            else:
+                mosquito_class = getattr(mosquito, stage)
+                mosquitoes += [mosquito_class(patch, bool(male), config) for _ in range(int(number))]
     return mosquitoes
+
+def populations_to_init_mosquitoes(populations):
+    """
+    Convert populations in the layout of a result to numbers of mosquitoes indexed by mosquito name.
+
+    The eggs, larvae and pupae of a result are not split by sex, they are split in two halves.
+
+    :param populations: Populations of each patch at one time step, of shape (N, number of result columns).
+    :type populations: np.ndarray
+    :return: Number of mosquitoes in each patch, indexed by mosquito name.
+    :rtype: dict
+    """
+    numbers = {}
+    for j, stage in enumerate(["Egg", "Larva", "Pupa"]):
+        total = np.rint(np.maximum(populations[:, j], 0)).astype(int)
+        numbers[f"Male {stage}"] = total // 2
+        numbers[f"Female {stage}"] = total - total // 2
+    for j, name in enumerate(COLUMN_NAMES[3:], start=3):
+        numbers[name] = np.rint(np.maximum(populations[:, j], 0)).astype(int)
+    return numbers
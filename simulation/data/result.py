@@ -1,10 +1,16 @@
 import math
 import os
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
+# Names of the columns of a result, mosquitoes of both sexes are merged for the first three stages.
+COLUMN_NAMES = ["Egg", "Larva", "Pupa", "Fertile Male Adult", "Fertile Female Adult",
+                "Sterile Male Adult", "Sterile Female Adult", "Mated Female Adult"]
+
+# Columns of the wild mosquitoes that can still take part in reproduction.
+FERTILE_COLUMNS = [0, 1, 2, 3, 4, 7]
+
 class Result:
     """
     This class represents the result of a multi-agent system simulation.
@@ -15,11 +21,11 @@ class Result:
     :type T: int
     :param dt: Time step.
     :type dt: int
-    :param folder_name: Name of the folder where results are saved.
-    :type folder_name: str
+    :param folder_name: Name of the folder where results are saved, defaults to None (nothing is saved).
+    :type folder_name: str, optional
     """
 
-    def __init__(self, N, T, dt, folder_name):
+    def __init__(self, N, T, dt, folder_name=None):
         """
         Constructor.
 
@@ -29,19 +35,49 @@ class Result:
         :type T: int
         :param dt: Time step.
         :type dt: int
-        :param folder_name: Name of the folder where results are saved.
-        :type folder_name: str
+        :param folder_name: Name of the folder where results are saved, defaults to None (nothing is saved).
+        :type folder_name: str, optional
         """
         self.__N = N
         self.__T = T
         self.__dt = dt
-        self.__column_names = ["Egg", "Larva", "Pupa", "Fertile Male Adult", "Fertile Female Adult",
-                               "Sterile Male Adult", "Sterile Female Adult", "Mated Female Adult"]
+        self.__column_names = COLUMN_NAMES
         self.__nt = int(T / dt) + 1
         self.__result = np.zeros((N, self.__nt, len(self.__column_names)))
         self.__t = 0
         self.__folder_name = folder_name
-        os.makedirs(folder_name, exist_ok=True)
+        if folder_name is not None:
+            os.makedirs(folder_name, exist_ok=True)
+
+    @property
+    def t(self):
+        """
+        Get the number of time steps recorded.
+
+        :return: Number of recorded time steps.
+        :rtype: int
+        """
+        return self.__t
+
+    @property
+    def values(self):
+        """
+        Get the populations of every patch at every time step.
+
+        :return: Array of shape (N, nt, number of columns).
+        :rtype: np.ndarray
+        """
+        return self.__result
+
+    @values.setter
+    def values(self, value):
+        """
+        Set the populations of every patch at every time step.
+
+        :param value: Array of shape (N, nt, number of columns).
+        :type value: np.ndarray
+        """
+        self.__result = np.asarray(value, dtype=float).reshape(self.__result.shape)
 
     def add_populations(self, populations):
         """
@@ -89,6 +125,8 @@ class Result:
 
         :return: None
         """
+        import matplotlib.pyplot as plt
+
         rows = math.isqrt(self.__N)
         cols = math.ceil(self.__N / rows)
         fig, axs = plt.subplots(rows, cols, figsize=(15, 10), constrained_layout=False)
@@ -0,0 +1,348 @@
+import os
+import math
+
+import numpy as np
+import pandas as pd
+
+from .result import Result, FERTILE_COLUMNS
+
+class QuantileSketch:
+    """
+    Streaming estimate of a quantile for every cell of an array, using the P² algorithm.
+
+    Five markers are kept per cell, so the memory does not depend on the number of observations.
+
+    :param p: Quantile to estimate, between 0 and 1.
+    :type p: float
+    :param shape: Shape of the observed arrays.
+    :type shape: tuple
+    """
+
+    def __init__(self, p, shape):
+        """
+        Constructor.
+
+        :param p: Quantile to estimate, between 0 and 1.
+        :type p: float
+        :param shape: Shape of the observed arrays.
+        :type shape: tuple
+        """
+        self.__p = p
+        self.__count = 0
+        self.__heights = np.zeros((5,) + tuple(shape))
+        self.__positions = np.tile(np.arange(1., 6.).reshape((5,) + (1,) * len(shape)), (1,) + tuple(shape))
+        self.__desired = np.array([1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5])
+        self.__increments = np.array([0, p / 2, p, (1 + p) / 2, 1])
+
+    @property
+    def p(self):
+        """
+        Get the estimated quantile.
+
+        :return: Quantile, between 0 and 1.
+        :rtype: float
+        """
+        return self.__p
+
+    def add(self, x):
+        """
+        Add an observation.
+
+        :param x: Observed array.
+        :type x: np.ndarray
+        """
+        if self.__count < 5:
+            self.__heights[self.__count] = x
+            self.__count += 1
+            if self.__count == 5:
+                self.__heights.sort(axis=0)
+            return
+        self.__count += 1
+
+        q = self.__heights
+        n = self.__positions
+        q[0] = np.minimum(q[0], x)
+        q[4] = np.maximum(q[4], x)
+        # Index of the first marker above x, markers after it move one position up.
+        k = np.clip((x[None] >= q[1:4]).sum(axis=0) + 1, 1, 4)
+        n += np.arange(5).reshape((5,) + (1,) * x.ndim) >= k[None]
+        self.__desired = self.__desired + self.__increments
+
+        for i in range(1, 4):
+            d = self.__desired[i] - n[i]
+            move = ((d >= 1) & (n[i + 1] - n[i] > 1)) | ((d <= -1) & (n[i - 1] - n[i] < -1))
+            if not move.any():
+                continue
+            d = np.sign(d)
+            parabolic = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+            q_j = np.where(d > 0, q[i + 1], q[i - 1])
+            n_j = np.where(d > 0, n[i + 1], n[i - 1])
+            linear = q[i] + d * (q_j - q[i]) / (n_j - n[i])
+            new_q = np.where((q[i - 1] < parabolic) & (parabolic < q[i + 1]), parabolic, linear)
+            q[i] = np.where(move, new_q, q[i])
+            n[i] = np.where(move, n[i] + d, n[i])
+
+    def get(self):
+        """
+        Get the current estimate.
+
+        :return: Estimated quantile for every cell.
+        :rtype: np.ndarray
+        """
+        if self.__count < 5:
+            if self.__count == 0:
+                return np.full(self.__heights.shape[1:], np.nan)
+            return np.quantile(self.__heights[:self.__count], self.__p, axis=0)
+        return self.__heights[2].copy()
+
+def t_quantile(confidence, df):
+    """
+    Quantile of Student's t distribution bounding a two-sided interval, e.g. 2.262 for 95% and 9 degrees of freedom.
+
+    The probability of the interval is the closed form of Abramowitz and Stegun (26.7.3 and 26.7.4) for integer
+    degrees of freedom, inverted by bisection.
+
+    :param confidence: Probability of the interval.
+    :type confidence: float
+    :param df: Degrees of freedom, at least 1.
+    :type df: int
+    :return: Half-width of the interval of a standard t variable.
+    :rtype: float
+    """
+    def probability(t):
+        theta = math.atan(t / math.sqrt(df))
+        c2 = math.cos(theta) ** 2
+        if df % 2:
+            term, total = 1., 1. if df > 1 else 0.
+            for k in range(1, (df - 1) // 2):
+                term *= c2 * 2 * k / (2 * k + 1)
+                total += term
+            return 2 / math.pi * (theta + math.sin(theta) * math.cos(theta) * total)
+        term, total = 1., 1.
+        for k in range(1, df // 2):
+            term *= c2 * (2 * k - 1) / (2 * k)
+            total += term
+        return math.sin(theta) * total
+
+    low, high = 0., 1.
+    while probability(high) < confidence:
+        low, high = high, 2 * high
+    for _ in range(100):
+        middle = (low + high) / 2
+        if probability(middle) < confidence:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+class Moments:
+    """
+    Mean and variance of arrays, updated one observation at a time with Welford's algorithm.
+
+    :param shape: Shape of the observed arrays.
+    :type shape: tuple
+    """
+
+    def __init__(self, shape):
+        """
+        Constructor.
+
+        :param shape: Shape of the observed arrays.
+        :type shape: tuple
+        """
+        self.__count = 0
+        self.__mean = np.zeros(shape)
+        self.__m2 = np.zeros(shape)
+
+    @property
+    def count(self):
+        """
+        Get the number of observations.
+
+        :return: Number of observations.
+        :rtype: int
+        """
+        return self.__count
+
+    @property
+    def mean(self):
+        """
+        Get the mean of the observations.
+
+        :return: Mean.
+        :rtype: np.ndarray
+        """
+        return self.__mean.copy()
+
+    @property
+    def variance(self):
+        """
+        Get the sample variance of the observations.
+
+        :return: Variance.
+        :rtype: np.ndarray
+        """
+        if self.__count < 2:
+            return np.zeros_like(self.__m2)
+        return self.__m2 / (self.__count - 1)
+
+    def add(self, x):
+        """
+        Add an observation.
+
+        :param x: Observed array.
+        :type x: np.ndarray
+        """
+        self.__count += 1
+        delta = x - self.__mean
+        self.__mean += delta / self.__count
+        self.__m2 += delta * (x - self.__mean)
+
+    def half_width(self, confidence=0.95):
+        """
+        Get the half-width of the Student's t confidence interval of the mean.
+
+        :param confidence: Confidence level, defaults to 0.95.
+        :type confidence: float, optional
+        :return: Half-width, infinite with less than two observations.
+        :rtype: np.ndarray
+        """
+        if self.__count < 2:
+            return np.full(self.__mean.shape, np.inf)
+        return t_quantile(confidence, self.__count - 1) * np.sqrt(self.variance / self.__count)
+
+class EnsembleStatistics:
+    """
+    Statistics of an ensemble of simulations, updated one replicate at a time.
+
+    The mean and variance are computed with Welford's algorithm and the quantiles with P² sketches, for every
+    patch, time step and column of the results. The probability that the wild population is extinct by time t
+    is also kept, for every patch and for the whole environment, a population being extinct once it has been present
+    and died out.
+
+    :param N: Number of patches.
+    :type N: int
+    :param T: Period.
+    :type T: int
+    :param dt: Time step.
+    :type dt: int
+    :param quantiles: Quantiles to estimate, defaults to (0.05, 0.5, 0.95).
+    :type quantiles: tuple of float, optional
+    """
+
+    def __init__(self, N, T, dt, quantiles=(0.05, 0.5, 0.95)):
+        """
+        Constructor.
+
+        :param N: Number of patches.
+        :type N: int
+        :param T: Period.
+        :type T: int
+        :param dt: Time step.
+        :type dt: int
+        :param quantiles: Quantiles to estimate, defaults to (0.05, 0.5, 0.95).
+        :type quantiles: tuple of float, optional
+        """
+        self.__N = N
+        self.__T = T
+        self.__dt = dt
+        shape = Result(N, T, dt).values.shape
+        self.__moments = Moments(shape)
+        self.__sketches = [QuantileSketch(p, shape) for p in quantiles]
+        self.__extinct = np.zeros((N + 1, shape[1]))
+
+    @property
+    def count(self):
+        """
+        Get the number of replicates added.
+
+        :return: Number of replicates.
+        :rtype: int
+        """
+        return self.__moments.count
+
+    @property
+    def mean(self):
+        """
+        Get the mean of the replicates.
+
+        :return: Array of shape (N, nt, number of columns).
+        :rtype: np.ndarray
+        """
+        return self.__moments.mean
+
+    @property
+    def variance(self):
+        """
+        Get the sample variance of the replicates.
+
+        :return: Array of shape (N, nt, number of columns).
+        :rtype: np.ndarray
+        """
+        return self.__moments.variance
+
+    @property
+    def extinction_probability(self):
+        """
+        Get the probability that the wild population is extinct by each time step.
+
+        :return: Array of shape (N + 1, nt), the last row is the whole environment.
+        :rtype: np.ndarray
+        """
+        if self.count == 0:
+            return self.__extinct.copy()
+        return self.__extinct / self.count
+
+    def quantile(self, p):
+        """
+        Get the estimate of a quantile.
+
+        :param p: One of the quantiles given to the constructor.
+        :type p: float
+        :return: Array of shape (N, nt, number of columns).
+        :rtype: np.ndarray
+        """
+        for sketch in self.__sketches:
+            if sketch.p == p:
+                return sketch.get()
+        raise KeyError(f"Quantile {p} is not estimated")
+
+    def add(self, values):
+        """
+        Add a replicate.
+
+        :param values: Populations of the replicate, as returned by ``Result.values``.
+        :type values: np.ndarray
+        """
+        values = np.asarray(values, dtype=float)
+        self.__moments.add(values)
+        for sketch in self.__sketches:
+            sketch.add(values)
+
+        wild = values[:, :, FERTILE_COLUMNS].sum(axis=2)
+        wild = np.vstack([wild, wild.sum(axis=0)])
+        # A population is extinct once it has died out, not while it has never been present.
+        extinct = (wild == 0) & (np.maximum.accumulate(wild, axis=1) > 0)
+        self.__extinct += np.maximum.accumulate(extinct, axis=1)
+
+    def write(self, folder_name):
+        """
+        Save the statistics, each one in a sub-folder with the same layout as ``Result.write``.
+
+        :param folder_name: Name of the folder where statistics are saved.
+        :type folder_name: str
+        :return: None
+        """
+        statistics = {"mean": self.mean, "std": np.sqrt(self.variance)}
+        statistics.update({f"q{sketch.p:g}": sketch.get() for sketch in self.__sketches})
+        for name, values in statistics.items():
+            result = Result(self.__N, self.__T, self.__dt, folder_name=f"{folder_name}/{name}")
+            result.values = values
+            result.write()
+
+        os.makedirs(folder_name, exist_ok=True)
+        df = pd.DataFrame(self.extinction_probability.T, columns=[str(i) for i in range(self.__N)] + ["All"])
+        df["Time"] = pd.Series([self.__dt * k for k in range(self.__extinct.shape[1])])
+        df.to_csv(f"{folder_name}/extinction.csv", index=False)
@@ -0,0 +1,170 @@
+import numpy as np
+
+from .result import COLUMN_NAMES
+
+# Column of the released sterile males, it is not filled by the stopping rules.
+STERILE_MALE_COLUMN = COLUMN_NAMES.index("Sterile Male Adult")
+
+# Columns of the wild mosquitoes, including the sterile females that no longer take part in reproduction.
+WILD_COLUMNS = [j for j in range(len(COLUMN_NAMES)) if j != STERILE_MALE_COLUMN]
+
+class Extinction:
+    """
+    Stop once the wild population, sterile females included, is extinct in every patch, the remaining rows are
+    filled with zeros.
+    """
+
+    def should_stop(self, values, t, remaining_releases):
+        """
+        Check if the simulation can stop.
+
+        :param values: Populations recorded so far, of shape (N, t, number of columns).
+        :type values: np.ndarray
+        :param t: Number of recorded time steps.
+        :type t: int
+        :param remaining_releases: True if sterile males are still to be released.
+        :type remaining_releases: bool
+        :return: True if the simulation can stop.
+        :rtype: bool
+        """
+        return not values[:, t - 1, WILD_COLUMNS].any()
+
+    def fill(self, values, t):
+        """
+        Fill the rows that were not simulated.
+
+        :param values: Populations of shape (N, nt, number of columns), filled in place from row t.
+        :type values: np.ndarray
+        :param t: Number of recorded time steps.
+        :type t: int
+        """
+        values[:, t:, :] = 0
+
+class SteadyState:
+    """
+    Stop once every population has stayed within a relative tolerance over a window and no release remains.
+
+    The remaining rows are filled with the mean over the window.
+
+    :param window: Number of time steps of the window.
+    :type window: int
+    :param tolerance: Maximum range of each population over the window, relative to its mean.
+    :type tolerance: float
+    """
+
+    def __init__(self, window, tolerance):
+        """
+        Constructor.
+
+        :param window: Number of time steps of the window.
+        :type window: int
+        :param tolerance: Maximum range of each population over the window, relative to its mean.
+        :type tolerance: float
+        """
+        self.__window = window
+        self.__tolerance = tolerance
+
+    def should_stop(self, values, t, remaining_releases):
+        """
+        Check if the simulation can stop.
+
+        :param values: Populations recorded so far, of shape (N, t, number of columns).
+        :type values: np.ndarray
+        :param t: Number of recorded time steps.
+        :type t: int
+        :param remaining_releases: True if sterile males are still to be released.
+        :type remaining_releases: bool
+        :return: True if the simulation can stop.
+        :rtype: bool
+        """
+        if remaining_releases or t < self.__window:
+            return False
+        window = np.delete(values[:, t - self.__window:t, :], STERILE_MALE_COLUMN, axis=2)
+        spread = window.max(axis=1) - window.min(axis=1)
+        return bool((spread <= self.__tolerance * np.maximum(window.mean(axis=1), 1)).all())
+
+    def fill(self, values, t):
+        """
+        Fill the rows that were not simulated.
+
+        :param values: Populations of shape (N, nt, number of columns), filled in place from row t.
+        :type values: np.ndarray
+        :param t: Number of recorded time steps.
+        :type t: int
+        """
+        values[:, t:, :] = values[:, t - self.__window:t, :].mean(axis=1, keepdims=True)
+
+class Predicate:
+    """
+    Stop when a user function of the recorded populations returns True.
+
+    :param function: Function taking the populations recorded so far, of shape (N, t, number of columns).
+    :type function: Callable[[np.ndarray], bool]
+    :param fill_value: How the remaining rows are filled, "last" to repeat the last row, "zeros" or "nan".
+    :type fill_value: str, optional
+    """
+
+    def __init__(self, function, fill_value="last"):
+        """
+        Constructor.
+
+        :param function: Function taking the populations recorded so far, of shape (N, t, number of columns).
+        :type function: Callable[[np.ndarray], bool]
+        :param fill_value: How the remaining rows are filled, "last" to repeat the last row, "zeros" or "nan".
+        :type fill_value: str, optional
+        """
+        if fill_value not in ["last", "zeros", "nan"]:
+            raise ValueError(f"Unknown fill value {fill_value}")
+        self.__function = function
+        self.__fill_value = fill_value
+
+    def should_stop(self, values, t, remaining_releases):
+        """
+        Check if the simulation can stop.
+
+        :param values: Populations recorded so far, of shape (N, t, number of columns).
+        :type values: np.ndarray
+        :param t: Number of recorded time steps.
+        :type t: int
+        :param remaining_releases: True if sterile males are still to be released.
+        :type remaining_releases: bool
+        :return: True if the simulation can stop.
+        :rtype: bool
+        """
+        return bool(self.__function(values[:, :t, :]))
+
+    def fill(self, values, t):
+        """
+        Fill the rows that were not simulated.
+
+        :param values: Populations of shape (N, nt, number of columns), filled in place from row t.
+        :type values: np.ndarray
+        :param t: Number of recorded time steps.
+        :type t: int
+        """
+        match self.__fill_value:
+            case "last":
+                values[:, t:, :] = values[:, t - 1:t, :]
+            case "zeros":
+                values[:, t:, :] = 0
+            case "nan":
+                values[:, t:, :] = np.nan
+
+def read_stopping_rules(config):
+    """
+    Create the stopping rules described by the "stopping" section of the configuration, if any.
+
+    The section may contain ``"extinction": true`` and ``"steady_state": {"window": ..., "tolerance": ...}``.
+
+    :param config: Configuration dictionary containing parameters for the simulation.
+    :type config: dict
+    :return: List of stopping rules.
+    :rtype: list
+    """
+    stopping = config.get("stopping", {})
+    rules = []
+    if stopping.get("extinction", False):
+        rules.append(Extinction())
+    if "steady_state" in stopping:
+        rules.append(SteadyState(stopping["steady_state"]["window"], stopping["steady_state"]["tolerance"]))
+    return rules
@@ -0,0 +1,167 @@
+import sys
+import os
+import time
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+if __package__ in (None, ""):
+    # Run as a script: make the package importable from the repository root.
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulation.data.reading import read_config
+from simulation.data.statistics import EnsembleStatistics, Moments
+from simulation.data.metrics import METRICS
+from simulation.simulation import run
+
+os.environ["OPENBLAS_MAIN_FREE"] = "1"
+
+def run_replicate(args):
+    """
+    Run one replicate and return its populations.
+
+    :param args: Configuration, initial mosquitoes file, control file and seed.
+    :type args: tuple
+    :return: Populations of the replicate.
+    :rtype: np.ndarray
+    """
+    config, init_mosquito_file, control_file, seed = args
+    return run(config, init_mosquito_file, control_file, seed=seed).values
+
+def run_ensemble(config, init_mosquito_file, control_file, replicates, processes=None, seed=None):
+    """
+    Run replicates of a simulation and aggregate them as they finish, only the statistics are kept in memory.
+
+    :param config: Configuration dictionary containing parameters for the simulation.
+    :type config: dict
+    :param init_mosquito_file: Path to the CSV file containing the initial mosquitoes.
+    :type init_mosquito_file: str
+    :param control_file: Path to the CSV file containing the control strategy.
+    :type control_file: str
+    :param replicates: Number of replicates.
+    :type replicates: int
+    :param processes: Number of worker processes, defaults to the number of CPUs.
+    :type processes: int, optional
+    :param seed: Seed from which the replicates' seeds are derived, defaults to None.
+    :type seed: int, optional
+    :return: Statistics of the ensemble.
+    :rtype: EnsembleStatistics
+    """
+    statistics = EnsembleStatistics(config["number_of_patches"], config["period"], config["dt"])
+    seeds = np.random.SeedSequence(seed).generate_state(replicates)
+    jobs = [(config, init_mosquito_file, control_file, int(s)) for s in seeds]
+    with Pool(processes) as pool:
+        for values in pool.imap_unordered(run_replicate, jobs):
+            statistics.add(values)
+    return statistics
+
+def run_adaptive_ensemble(config, init_mosquito_file, control_file, target_widths, max_replicates, batch_size=10,
+                          processes=None, seed=None, confidence=0.95, min_replicates=30):
+    """
+    Run batches of replicates until the confidence intervals of some metrics are narrow enough.
+
+    After each batch, the confidence interval of the mean of every metric, in every patch, is compared to its target
+    width. Replicates are added until all of them are narrower, with at least ``min_replicates`` replicates, or
+    ``max_replicates`` is reached. The minimum keeps a degenerate first batch, e.g. replicates that all eliminate the
+    population near the elimination threshold, from stopping the ensemble with a zero width: by the rule of three,
+    30 identical replicates only bound the probability of another outcome by 10% at 95% confidence.
+
+    :param config: Configuration dictionary containing parameters for the simulation.
+    :type config: dict
+    :param init_mosquito_file: Path to the CSV file containing the initial mosquitoes.
+    :type init_mosquito_file: str
+    :param control_file: Path to the CSV file containing the control strategy.
+    :type control_file: str
+    :param target_widths: Target width of the confidence interval of each metric, indexed by name in
+                          ``data.metrics.METRICS``.
+    :type target_widths: dict
+    :param max_replicates: Maximum number of replicates.
+    :type max_replicates: int
+    :param batch_size: Number of replicates added at once, defaults to 10.
+    :type batch_size: int, optional
+    :param processes: Number of worker processes, defaults to the number of CPUs.
+    :type processes: int, optional
+    :param seed: Seed from which the replicates' seeds are derived, defaults to None.
+    :type seed: int, optional
+    :param confidence: Confidence level of the intervals, defaults to 0.95.
+    :type confidence: float, optional
+    :param min_replicates: Minimum number of replicates, defaults to 30.
+    :type min_replicates: int, optional
+    :return: Statistics of the ensemble and moments of each metric.
+    :rtype: Tuple[EnsembleStatistics, dict]
+    """
+    statistics = EnsembleStatistics(config["number_of_patches"], config["period"], config["dt"])
+    moments = {name: Moments(config["number_of_patches"]) for name in target_widths}
+    seeds = np.random.SeedSequence(seed).generate_state(max_replicates)
+    with Pool(processes) as pool:
+        while statistics.count < max_replicates:
+            batch = seeds[statistics.count:statistics.count + batch_size]
+            jobs = [(config, init_mosquito_file, control_file, int(s)) for s in batch]
+            for values in pool.imap_unordered(run_replicate, jobs):
+                statistics.add(values)
+                for name, metric_moments in moments.items():
+                    metric_moments.add(METRICS[name](values, config["dt"]))
+            if statistics.count < min_replicates:
+                continue
+            if all((2 * moments[name].half_width(confidence) <= width).all() for name, width in target_widths.items()):
+                break
+    return statistics, moments
+
+def write_metrics(moments, folder_name, confidence=0.95):
+    """
+    Save the mean and the confidence interval half-width of each metric in each patch to ``metrics.csv``.
+
+    :param moments: Moments of each metric, indexed by name.
+    :type moments: dict
+    :param folder_name: Name of the folder where the metrics are saved.
+    :type folder_name: str
+    :param confidence: Confidence level of the intervals, defaults to 0.95.
+    :type confidence: float, optional
+    """
+    rows = []
+    for name, metric_moments in moments.items():
+        for patch, (mean, half_width) in enumerate(zip(metric_moments.mean, metric_moments.half_width(confidence))):
+            rows.append({"metric": name, "patch": patch, "mean": mean, "half_width": half_width,
+                         "replicates": metric_moments.count})
+    os.makedirs(folder_name, exist_ok=True)
+    pd.DataFrame(rows).to_csv(f"{folder_name}/metrics.csv", index=False)
+
+if __name__ == "__main__":
+    # Usage: python ensemble.py <config_file> <init_mosquito_file> <control_file> <folder_name> <replicates>
+    #                           [<processes>] [--ci-width <metric>=<width> ...] [--batch <size>] [--min <replicates>]
+    args = sys.argv[1:]
+    target_widths = {}
+    batch_size = 10
+    min_replicates = 30
+    while "--ci-width" in args:
+        index = args.index("--ci-width")
+        name, width = args[index + 1].split("=")
+        target_widths[name] = float(width)
+        del args[index:index + 2]
+    if "--batch" in args:
+        index = args.index("--batch")
+        batch_size = int(args[index + 1])
+        del args[index:index + 2]
+    if "--min" in args:
+        index = args.index("--min")
+        min_replicates = int(args[index + 1])
+        del args[index:index + 2]
+    config = read_config(args[0])
+    init_mosquito_file, control_file, folder_name = args[1:4]
+    replicates = int(args[4])
+    processes = int(args[5]) if len(args) > 5 else None
+
+    tic = time.time()
+
+    if target_widths:
+        statistics, moments = run_adaptive_ensemble(config, init_mosquito_file, control_file, target_widths,
+                                                    replicates, batch_size, processes,
+                                                    min_replicates=min_replicates)
+        write_metrics(moments, folder_name)
+    else:
+        statistics = run_ensemble(config, init_mosquito_file, control_file, replicates, processes)
+    statistics.write(folder_name)
+
+    toc = time.time()
+    print(toc - tic)
@@ -0,0 +1,293 @@
+import numpy as np
+
+from ..random_variable.random_variable import simulate
+from ..agents.cohort import SterileCohorts
+from ..agents.mosquito import name_to_type
+
+# Stages of the mosquitoes, in the order of their life cycle.
+STAGES = ["Egg", "Larva", "Pupa", "Adult"]
+
+class BatchEnvironment:
+    """
+    Environment simulating several independent replicates of the same scenario with array operations.
+
+    Mosquitoes are stored as arrays of attributes, one element per mosquito of any replicate, and every time step
+    updates all of them at once with the same rules as ``Environment``: they grow old, change stage or die, lay eggs,
+    mate, and migrate. Within a time step the mosquitoes are updated together rather than one after the other, the
+    room left for eggs in a patch being shared in a random order between the females laying at that time step.
+
+    :param numbers_by_name: Number of initial mosquitoes in each patch, indexed by mosquito name.
+    :type numbers_by_name: pd.DataFrame
+    :param config: Configuration dictionary containing parameters for the simulation.
+    :type config: dict
+    :param replicates: Number of replicates.
+    :type replicates: int
+    """
+
+    def __init__(self, numbers_by_name, config, replicates):
+        """
+        Constructor.
+
+        :param numbers_by_name: Number of initial mosquitoes in each patch, indexed by mosquito name.
+        :type numbers_by_name: pd.DataFrame
+        :param config: Configuration dictionary containing parameters for the simulation.
+        :type config: dict
+        :param replicates: Number of replicates.
+        :type replicates: int
+        """
+        self.__config = config
+        self.__R = replicates
+        self.__N = config["number_of_patches"]
+        self.__dt = config["dt"]
+        self.__time = 0
+        self.__mating_rates = np.asarray(config["mating_rates"], dtype=float)
+        self.__capacity = np.asarray(config["capacity"], dtype=float)
+        self.__cum_migration_rates = np.cumsum(np.asarray(config["migration_rates"], dtype=float), axis=1)
+        self.__sterile_cohorts = SterileCohorts(config["migration_rates"], config["sterile male adult"]["lifespan"],
+                                                replicates=replicates)
+
+        self.__replicate = np.zeros(0, dtype=np.int64)
+        self.__patch = np.zeros(0, dtype=np.int64)
+        self.__stage = np.zeros(0, dtype=np.int64)
+        self.__male = np.zeros(0, dtype=bool)
+        self.__fertile = np.zeros(0, dtype=bool)
+        self.__mated = np.zeros(0, dtype=bool)
+        self.__age = np.zeros(0)
+        self.__duration = np.zeros(0)
+        self.__survive = np.zeros(0, dtype=bool)
+        self.__cycle_number = np.zeros(0, dtype=np.int64)
+        self.__next_cycle = np.zeros(0)
+
+        for name, numbers in numbers_by_name.items():
+            if name == "Sterile Male Adult":
+                continue
+            stage, male, fertile, mated = name_to_type(name)
+            numbers = np.rint(np.asarray(numbers, dtype=float)).astype(np.int64)
+            patch = np.tile(np.repeat(np.arange(self.__N), numbers), replicates)
+            replicate = np.repeat(np.arange(replicates), numbers.sum())
+            self.__add(replicate, patch, STAGES.index(stage), np.full(len(patch), bool(male)), bool(fertile), bool(mated))
+
+    @property
+    def time(self):
+        """
+        Get the current time in the environment.
+
+        :return: Current time.
+        :rtype: int
+        """
+        return self.__time
+
+    def __add(self, replicate, patch, stage, male, fertile=True, mated=False):
+        """
+        Add new mosquitoes of the same stage at age 0.
+
+        :param replicate: Replicate of each mosquito.
+        :type replicate: np.ndarray
+        :param patch: Patch of each mosquito.
+        :type patch: np.ndarray
+        :param stage: Index of the stage in ``STAGES``.
+        :type stage: int
+        :param male: Sex of each mosquito.
+        :type male: np.ndarray
+        :param fertile: True if the mosquitoes are fertile, defaults to True.
+        :type fertile: bool, optional
+        :param mated: True if the mosquitoes are mated females, defaults to False.
+        :type mated: bool, optional
+        """
+        n = len(replicate)
+        if n == 0:
+            return
+        duration, survive = self.__draw_stage(stage, male, fertile)
+        next_cycle = np.zeros(n)
+        if mated:
+            first_blood = self.__config["female adult"]["first blood"]
+            next_cycle = simulate(first_blood["dist"], first_blood["params"], n)
+        self.__replicate = np.concatenate([self.__replicate, replicate])
+        self.__patch = np.concatenate([self.__patch, patch])
+        self.__stage = np.concatenate([self.__stage, np.full(n, stage)])
+        self.__male = np.concatenate([self.__male, male])
+        self.__fertile = np.concatenate([self.__fertile, np.full(n, fertile)])
+        self.__mated = np.concatenate([self.__mated, np.full(n, mated)])
+        self.__age = np.concatenate([self.__age, np.zeros(n)])
+        self.__duration = np.concatenate([self.__duration, duration])
+        self.__survive = np.concatenate([self.__survive, survive])
+        self.__cycle_number = np.concatenate([self.__cycle_number, np.ones(n, dtype=np.int64)])
+        self.__next_cycle = np.concatenate([self.__next_cycle, next_cycle])
+
+    def __draw_stage(self, stage, male, fertile=True):
+        """
+        Draw the duration and the survival of mosquitoes entering a stage.
+
+        :return: Durations (lifespans for adults) and survivals.
+        :rtype: Tuple[np.ndarray, np.ndarray]
+        """
+        n = len(male)
+        if STAGES[stage] != "Adult":
+            key = STAGES[stage].lower()
+            dist = self.__config[key]["duration"]
+            return (simulate(dist["dist"], dist["params"], n),
+                    simulate("bernoulli", [self.__config[key]["survival_rate"]], n).astype(bool))
+        duration = np.zeros(n)
+        for sex, lifespan_key in [(True, "male adult" if fertile else "sterile male adult"), (False, "female adult")]:
+            mask = male == sex
+            dist = self.__config[lifespan_key]["lifespan"]
+            duration[mask] = simulate(dist["dist"], dist["params"], int(mask.sum()))
+        return duration, np.ones(n, dtype=bool)
+
+    def __keep(self, mask):
+        """
+        Keep only the mosquitoes selected by a mask.
+        """
+        self.__replicate = self.__replicate[mask]
+        self.__patch = self.__patch[mask]
+        self.__stage = self.__stage[mask]
+        self.__male = self.__male[mask]
+        self.__fertile = self.__fertile[mask]
+        self.__mated = self.__mated[mask]
+        self.__age = self.__age[mask]
+        self.__duration = self.__duration[mask]
+        self.__survive = self.__survive[mask]
+        self.__cycle_number = self.__cycle_number[mask]
+        self.__next_cycle = self.__next_cycle[mask]
+
+    def __count(self, mask):
+        """
+        Count the mosquitoes selected by a mask in each replicate and patch.
+
+        :return: Array of shape (R, N).
+        :rtype: np.ndarray
+        """
+        cell = self.__replicate[mask] * self.__N + self.__patch[mask]
+        return np.bincount(cell, minlength=self.__R * self.__N).reshape(self.__R, self.__N)
+
+    def step(self):
+        """
+        Simulate one time step for every mosquito of every replicate.
+        """
+        dt = self.__dt
+        config = self.__config
+        adult = STAGES.index("Adult")
+
+        # Grow old: immature mosquitoes die or change stage, adults die once their lifespan is over.
+        self.__age += dt
+        immature = self.__stage < adult
+        alive = np.where(immature, self.__survive, self.__age <= self.__duration)
+        self.__keep(alive)
+        for stage in range(adult - 1, -1, -1):
+            grown = (self.__stage == stage) & (self.__age > self.__duration)
+            if grown.any():
+                duration, survive = self.__draw_stage(stage + 1, self.__male[grown])
+                self.__stage[grown] = stage + 1
+                self.__age[grown] = 0
+                self.__duration[grown] = duration
+                self.__survive[grown] = survive
+
+        # Lay eggs: females at the date of a new gonotrophic cycle share the room left in their patch.
+        eggs_before = self.__count(self.__stage == 0)
+        adults = self.__stage == adult
+        laying = np.flatnonzero(adults & self.__mated & ~self.__male
+                                & (self.__cycle_number < config["female adult"]["mate"]["max cycle"])
+                                & (self.__next_cycle - dt < self.__age) & (self.__age < self.__next_cycle + dt))
+        next_cycle = config["female adult"]["mate"]["next cycle"]
+        self.__cycle_number[laying] += 1
+        self.__next_cycle[laying] = self.__age[laying] + simulate(next_cycle["dist"], next_cycle["params"], len(laying))
+        eggs = self.__lay_eggs(np.random.permutation(laying), eggs_before)
+
+        # Mate: fertile females meet a fertile male with a probability given by the males of their patch.
+        fertile_males = self.__count(adults & self.__male & self.__fertile)
+        sterile_males = self.__count(adults & self.__male & ~self.__fertile) + self.__sterile_cohorts.get_numbers()
+        competitiveness = config["sterile male adult"]["competitiveness"]
+        males = fertile_males + competitiveness * sterile_males
+        p_fertile = np.divide(fertile_males, males, out=np.zeros(males.shape), where=males > 0)
+        candidates = np.flatnonzero(adults & ~self.__male & self.__fertile)
+        mating = candidates[np.random.random(len(candidates)) < self.__mating_rates[self.__patch[candidates]]]
+        self.__fertile[mating] = False
+        mated = mating[np.random.random(len(mating)) < p_fertile[self.__replicate[mating], self.__patch[mating]]]
+        first_blood = config["female adult"]["first blood"]
+        self.__mated[mated] = True
+        self.__next_cycle[mated] = self.__age[mated] + simulate(first_blood["dist"], first_blood["params"], len(mated))
+
+        # Migrate: adults move to a patch drawn from the migration rates of their patch.
+        movers = np.flatnonzero(self.__stage == adult)
+        r = np.random.random(len(movers))
+        destination = (self.__cum_migration_rates[self.__patch[movers]] < r[:, None]).sum(axis=1)
+        self.__patch[movers] = np.minimum(destination, self.__N - 1)
+
+        # Eggs laid during the time step start to grow at the next one.
+        self.__add(*eggs[:2], STAGES.index("Egg"), eggs[2])
+
+    def __lay_eggs(self, laying, eggs_before):
+        """
+        Draw the eggs laid by females, scaled so that the eggs of a patch do not exceed its capacity.
+
+        :param laying: Indices of the laying females, in the order they lay.
+        :type laying: np.ndarray
+        :param eggs_before: Number of eggs in each replicate and patch.
+        :type eggs_before: np.ndarray
+        :return: Replicate, patch and sex of each egg.
+        :rtype: Tuple[np.ndarray, np.ndarray, np.ndarray]
+        """
+        eggs_dist = self.__config["female adult"]["mate"]["number of eggs"]
+        n = len(laying)
+        female_eggs = simulate(eggs_dist["female"]["dist"], eggs_dist["female"]["params"], n)
+        male_eggs = simulate(eggs_dist["male"]["dist"], eggs_dist["male"]["params"], n)
+        requested = female_eggs + male_eggs
+
+        # Eggs requested by the females laying before each female in the same replicate and patch.
+        cell = self.__replicate[laying] * self.__N + self.__patch[laying]
+        order = np.argsort(cell, kind="stable")
+        cumulative = np.cumsum(requested[order])
+        first = np.searchsorted(cell[order], cell[order], side="left")
+        before = np.empty(n)
+        before[order] = cumulative - requested[order] - np.where(first > 0, cumulative[first - 1], 0)
+
+        room = np.maximum(self.__capacity[self.__patch[laying]] - eggs_before.reshape(-1)[cell] - before, 0)
+        K = np.minimum(room / requested, 1)
+        number_of_female_eggs = (female_eggs * K).astype(np.int64)
+        number_of_male_eggs = (male_eggs * K).astype(np.int64)
+        mothers = np.concatenate([np.repeat(laying, number_of_female_eggs), np.repeat(laying, number_of_male_eggs)])
+        male = np.repeat([False, True], [number_of_female_eggs.sum(), number_of_male_eggs.sum()])
+        return self.__replicate[mothers], self.__patch[mothers], male
+
+    def release_sterile_mosquitoes(self, numbers, age, lifespan_dist=None):
+        """
+        Release sterile males as a new cohort in every replicate.
+
+        :param numbers: Number of sterile males to release in each patch.
+        :type numbers: np.ndarray
+        :param age: Age of the released males.
+        :type age: float
+        :param lifespan_dist: Distribution parameters for the lifespan of the released males, defaults to None (the
+                              configured one).
+        :type lifespan_dist: dict, optional
+        """
+        self.__sterile_cohorts.add(numbers, age, lifespan_dist)
+
+    def grow_old_sterile_mosquitoes(self):
+        """
+        Age and migrate the released sterile males by one time step.
+        """
+        self.__sterile_cohorts.grow_old(self.__dt)
+
+    def next_time(self):
+        """
+        Advance the environment time by one time step.
+        """
+        self.__time += self.__dt
+
+    def get_populations(self):
+        """
+        Get the populations of every replicate and patch, in the layout of a result.
+
+        :return: Array of shape (R, N, number of result columns).
+        :rtype: np.ndarray
+        """
+        adults = self.__stage == STAGES.index("Adult")
+        female = adults & ~self.__male
+        populations = [self.__count(self.__stage == stage) for stage in range(STAGES.index("Adult"))]
+        populations += [self.__count(adults & self.__male & self.__fertile),
+                        self.__count(female & self.__fertile),
+                        self.__count(adults & self.__male & ~self.__fertile) + self.__sterile_cohorts.get_numbers(),
+                        self.__count(female & ~self.__fertile & ~self.__mated),
+                        self.__count(female & self.__mated)]
+        return np.stack(populations, axis=-1)
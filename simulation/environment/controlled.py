@@ -0,0 +1,131 @@
+import random
+
+import numpy as np
+
+from ..simulation import create_environment
+from ..data.control import Control
+from ..data.reading import init_mosquitoes_frame
+from .batch import BatchEnvironment
+
+class ControlledEnvironment:
+    """
+    Simulation advanced one time step at a time, with the releases of each time step chosen by the caller.
+
+    This lets closed-loop release policies (model-predictive control, reinforcement learning) decide each release
+    from the populations observed so far, without restarting the simulation. Without replicates, the agent-based
+    ``Environment`` is simulated, with replicates, a ``BatchEnvironment`` steps all of them at once.
+
+    With the same seed, releasing the rows of a control matrix reproduces ``simulation.run``: the observation
+    after ``reset`` and after the k-th step are the rows 1 and k + 1 of its result (row 0 being the populations
+    before the released sterile males of the initial populations grow old). The same holds for ``run_batch``.
+
+    :param config: Configuration dictionary containing parameters for the simulation.
+    :type config: dict
+    :param init_mosquitoes: Path to the CSV file containing the initial mosquitoes, or their numbers in each patch
+                            indexed by mosquito name. Sterile male adults are released as a cohort.
+    :type init_mosquitoes: str or dict or pd.DataFrame
+    :param replicates: Number of independent replicates simulated together, defaults to None (a single one).
+    :type replicates: int, optional
+    """
+
+    def __init__(self, config, init_mosquitoes, replicates=None):
+        """
+        Constructor, the simulation starts with ``reset``.
+
+        :param config: Configuration dictionary containing parameters for the simulation.
+        :type config: dict
+        :param init_mosquitoes: Path to the CSV file containing the initial mosquitoes, or their numbers in each
+                                patch indexed by mosquito name. Sterile male adults are released as a cohort.
+        :type init_mosquitoes: str or dict or pd.DataFrame
+        :param replicates: Number of independent replicates simulated together, defaults to None (a single one).
+        :type replicates: int, optional
+        """
+        self.__config = config
+        self.__init_mosquitoes = init_mosquitoes_frame(init_mosquitoes)
+        self.__replicates = replicates
+        self.__environment = None
+        self.__release_age = Control(config["number_of_patches"], config["period"], config["dt"]).release_age
+
+    @property
+    def time(self):
+        """
+        Get the current time of the simulation.
+
+        :return: Current time.
+        :rtype: int
+        """
+        return self.__environment.time
+
+    @property
+    def done(self):
+        """
+        Check if the period of the configuration is over, that is if the last time step recorded by
+        ``simulation.run`` has been observed.
+
+        :return: True if the next time step is the period or later.
+        :rtype: bool
+        """
+        return self.time + self.__config["dt"] >= self.__config["period"]
+
+    def reset(self, seed=None):
+        """
+        Start a new simulation from the initial mosquitoes.
+
+        :param seed: Seed of the random generators, defaults to None.
+        :type seed: int, optional
+        :return: Populations at time 0, see ``observe``.
+        :rtype: np.ndarray
+        """
+        if seed is not None:
+            random.seed(seed)
+            np.random.seed(seed)
+        if self.__replicates is None:
+            # No release is planned, the releases are given to each step.
+            no_release = np.zeros((1, self.__config["number_of_patches"]))
+            self.__environment, _ = create_environment(self.__config, self.__init_mosquitoes, no_release)
+            # Same first time step as simulation.run: no mosquito is in the current queue yet.
+            self.__environment.grow_old_mosquitoes(self.__config)
+        else:
+            self.__environment = BatchEnvironment(self.__init_mosquitoes, self.__config, self.__replicates)
+            if "Sterile Male Adult" in self.__init_mosquitoes:
+                self.__environment.release_sterile_mosquitoes(self.__init_mosquitoes["Sterile Male Adult"].values,
+                                                              self.__release_age)
+        self.__environment.grow_old_sterile_mosquitoes()
+        return self.observe()
+
+    def step(self, releases):
+        """
+        Release sterile males, then simulate one time step.
+
+        :param releases: Number of sterile males to release in each patch, the same for every replicate or one row
+                         per replicate.
+        :type releases: np.ndarray
+        :return: Populations after the time step, see ``observe``.
+        :rtype: np.ndarray
+        """
+        releases = np.rint(np.asarray(releases, dtype=float)).astype(np.int64)
+        if self.__replicates is None:
+            self.__environment.release_sterile_mosquitoes(releases, self.__release_age, self.__config)
+            self.__environment.next_time()
+            self.__environment.grow_old_mosquitoes(self.__config)
+        else:
+            self.__environment.release_sterile_mosquitoes(releases, self.__release_age)
+            self.__environment.next_time()
+            self.__environment.step()
+        self.__environment.grow_old_sterile_mosquitoes()
+        return self.observe()
+
+    def observe(self):
+        """
+        Get the current populations.
+
+        :return: Populations of shape (N, number of columns), with a leading replicate axis if there are replicates,
+                 the columns are ``data.result.COLUMN_NAMES``.
+        :rtype: np.ndarray
+        """
+        if self.__replicates is not None:
+            return self.__environment.get_populations()
+        populations = np.array(self.__environment.get_populations(), dtype=float)
+        # Eggs, larvae and pupae of both sexes are merged, as in Result.add_populations.
+        stages = populations[:, :6].reshape(len(populations), 3, 2).sum(axis=2)
+        return np.concatenate([stages, populations[:, 6:]], axis=1)
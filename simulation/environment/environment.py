@@ -1,10 +1,12 @@
+import copy
 import queue
 import random
 from typing import List, Optional, Tuple
 
-from random_variable.random_variable import simulate
-from agents.mosquito import MOSQUITO_TYPE, Mosquito, Egg, Adult, name_to_type
-from environment.patch import Patch
+from ..random_variable.random_variable import simulate
+from ..agents.mosquito import MOSQUITO_TYPE, Mosquito, Egg, name_to_type, type_to_name
+from ..agents.cohort import SterileCohorts
+from .patch import Patch
 
 class Environment:
     """
@@ -34,6 +36,8 @@ class Environment:
         self.__current_queue = 0
         self.__patches = patches
         self.__mosquitoes = [queue.Queue(), queue.Queue()]
+        self.__sterile_cohorts = None
+        self.__event_log = None
         self.add_mosquitoes(mosquitoes)
 
     @property
@@ -46,6 +50,26 @@ class Environment:
         """
         return self.__time
 
+    @property
+    def event_log(self):
+        """
+        Get the log counting the events of the simulation.
+
+        :return: Event log, None if the events are not logged.
+        :rtype: EventLog
+        """
+        return self.__event_log
+
+    @event_log.setter
+    def event_log(self, value):
+        """
+        Set the log counting the events of the simulation.
+
+        :param value: Event log, None to stop logging the events.
+        :type value: EventLog
+        """
+        self.__event_log = value
+
     def __add_mosquito(self, mosquito: Mosquito):
         """
         Add a mosquito to the environment.
@@ -68,6 +92,25 @@ class Environment:
         for mosquito in mosquitoes:
             self.__add_mosquito(mosquito)
 
+    def clone(self) -> "Environment":
+        """
+        Copy the environment, so that the copy can be simulated independently from this one.
+
+        The mosquitoes are copied with the fates already drawn for them (durations, survival) and keep sharing the
+        configuration, which is never modified during a simulation.
+
+        :return: Independent copy of the environment.
+        :rtype: Environment
+        """
+        clone = copy.copy(self)
+        clone.__patches = [copy.deepcopy(patch) for patch in self.__patches]
+        clone.__mosquitoes = [queue.Queue(), queue.Queue()]
+        for mosquitoes, cloned_mosquitoes in zip(self.__mosquitoes, clone.__mosquitoes):
+            for mosquito in list(mosquitoes.queue):
+                cloned_mosquitoes.put(copy.copy(mosquito))
+        clone.__sterile_cohorts = copy.deepcopy(self.__sterile_cohorts)
+        return clone
+
     def get_mosquito(self) -> Mosquito:
         """
         Get the next mosquito from the queue.
@@ -103,6 +146,8 @@ class Environment:
 
         if not alive:
             self.__patches[mosquito.patch].remove_mosquito(mosquito)
+            if self.__event_log is not None:
+                self.__event_log.add(mosquito.patch, f"{type_to_name(self.__type(mosquito))} died")
             return None, False
 
         if lay_eggs:
@@ -112,8 +157,25 @@ class Environment:
         if new_mosquito.stage() != mosquito.stage():
             self.__patches[mosquito.patch].remove_mosquito(mosquito)
             self.__patches[new_mosquito.patch].add_mosquito(new_mosquito)
+            if self.__event_log is not None:
+                self.__event_log.add(mosquito.patch, f"{type_to_name(self.__type(mosquito))} to "
+                                                     f"{type_to_name(self.__type(new_mosquito))}")
         return new_mosquito, True
 
+    def grow_old_mosquitoes(self, config: dict):
+        """
+        Age, mate and migrate every mosquito of the current queue, which is empty afterwards.
+
+        :param config: Configuration dictionary containing parameters for the simulation.
+        :type config: dict
+        """
+        while not self.empty_queue():
+            mosquito, alive = self.grow_old(self.get_mosquito(), config)
+            if not alive:
+                continue
+            self.mate(mosquito, config)
+            self.migrate(mosquito)
+
     def mate(self, mosquito: Mosquito, config: dict):
         """
         Attempt to mate the mosquito.
@@ -130,6 +192,8 @@ class Environment:
         mosquito.become_sterile(patch)
         if patch.is_fertile_partner(config["sterile male adult"]["competitiveness"]):
             mosquito.become_mated(patch)
+        if self.__event_log is not None:
+            self.__event_log.add(mosquito.patch, f"Fertile Female Adult to {type_to_name(self.__type(mosquito))}")
 
     def migrate(self, mosquito: Mosquito):
         """
@@ -144,11 +208,25 @@ class Environment:
 
         id_destination = self.__patches[mosquito.patch].random_destination()
         if id_destination != mosquito.patch:
+            if self.__event_log is not None:
+                self.__event_log.add(mosquito.patch, f"{type_to_name(self.__type(mosquito))} to patch {id_destination}")
             self.__patches[mosquito.patch].remove_mosquito(mosquito)
             mosquito.patch = id_destination
             self.__patches[id_destination].add_mosquito(mosquito)
         self.__mosquitoes[(self.__current_queue + 1) % 2].put(mosquito)
 
+    @staticmethod
+    def __type(mosquito: Mosquito) -> tuple:
+        """
+        Get the type of a mosquito, as in ``MOSQUITO_TYPE``.
+
+        :param mosquito: The mosquito.
+        :type mosquito: Mosquito
+        :return: Stage, sex, fertility and mating status.
+        :rtype: tuple
+        """
+        return mosquito.stage(), mosquito.male, mosquito.fertile, mosquito.mated
+
     def get_populations(self) -> List[List[int]]:
         """
         Get the populations of mosquitoes in each patch.
@@ -186,16 +264,73 @@ class Environment:
             [Egg(patch=patch, male=False, config=config) for _ in range(int(number_of_female_eggs))]
             + [Egg(patch=patch, male=True, config=config) for _ in range(int(number_of_male_eggs))]
         )
+        if self.__event_log is not None:
+            self.__event_log.add(patch, "Female Egg laid", int(number_of_female_eggs))
+            self.__event_log.add(patch, "Male Egg laid", int(number_of_male_eggs))
         return int(number_of_female_eggs), int(number_of_male_eggs)
 
     def add_sterile_mosquitoes(self, control, config):
         """
         Add sterile mosquitoes to the environment based on the control strategy.
 
+        Released males are not materialized as agents, they are added as cohorts to the patches' sterile counts, one
+        per age and lifespan distribution of the releases of the current time.
+
         :param control: Control strategy for adding sterile mosquitoes.
         :type control: Control
+        :param config: Configuration dictionary containing parameters for the simulation.
+        :type config: dict
+        """
+        for numbers, age, lifespan_dist in control.get_release_events(self.time):
+            self.release_sterile_mosquitoes(numbers, age, config, lifespan_dist)
+
+    def release_sterile_mosquitoes(self, numbers, age, config, lifespan_dist=None):
+        """
+        Release sterile males as a new cohort.
+
+        :param numbers: Number of sterile males to release in each patch.
+        :type numbers: np.ndarray
+        :param age: Age of the released males.
+        :type age: float
+        :param config: Configuration dictionary containing parameters for the simulation.
+        :type config: dict
+        :param lifespan_dist: Distribution parameters for the lifespan of the released males, defaults to None (the
+                              configured one).
+        :type lifespan_dist: dict, optional
+        """
+        if self.__sterile_cohorts is None:
+            self.__sterile_cohorts = SterileCohorts([patch.migration_rates for patch in self.__patches],
+                                                    config["sterile male adult"]["lifespan"])
+        self.__sterile_cohorts.add(numbers, age, lifespan_dist)
+        self.__update_released()
+
+    def grow_old_sterile_mosquitoes(self):
+        """
+        Age and migrate the released sterile males by one time step.
+
+        Released males are processed after every other mosquito of the time step, so this is called once the
+        current queue is empty.
+        """
+        if self.__sterile_cohorts is None:
+            return
+        self.__sterile_cohorts.grow_old(self.__dt)
+        self.__update_released()
+
+    def get_released(self) -> List[int]:
+        """
+        Get the number of released sterile males alive in each patch.
+
+        :return: Number of released sterile males per patch.
+        :rtype: List[int]
+        """
+        return [patch.released for patch in self.__patches]
+
+    def __update_released(self):
+        """
+        Copy the number of released sterile males alive in each patch to the patches.
         """
-        self.add_mosquitoes(control.get_mosquitoes(self.time, Adult, config))
+        for patch, number in zip(self.__patches, self.__sterile_cohorts.get_numbers()):
+            patch.released = int(number)
 
     def empty_queue(self) -> bool:
         """
@@ -29,6 +29,7 @@ class Patch:
         self.__capacity = capacity
         self.__cum_migration_rates = np.cumsum(self.__migration_rates)
         self.__mosquitoes = {}
+        self.__released = 0
 
     def add_mosquito(self, mosquito):
         """
@@ -62,6 +63,8 @@ class Patch:
         :return: Number of mosquitoes of the specified type.
         :rtype: int
         """
+        if mosquito_type == ("Adult", True, False, False):
+            return self.__mosquitoes.get(mosquito_type, 0) + self.__released
         return self.__mosquitoes.get(mosquito_type, 0)
 
     def is_fertile_partner(self, competitiveness: float) -> bool:
@@ -78,6 +81,26 @@ class Patch:
 
         return random.uniform(0, male_number) < self.get_mosquitoes_number(("Adult", True, True, False))
 
+    @property
+    def released(self) -> int:
+        """
+        Get the number of released sterile males in the patch, tracked as cohorts instead of agents.
+
+        :return: Number of released sterile males.
+        :rtype: int
+        """
+        return self.__released
+
+    @released.setter
+    def released(self, value: int):
+        """
+        Set the number of released sterile males in the patch.
+
+        :param value: The new number of released sterile males.
+        :type value: int
+        """
+        self.__released = value
+
     @property
     def migration_rates(self) -> list:
         """
@@ -1,54 +1,30 @@
 import sys
 import os
 import time
-import random
 
-from data.reading import read_config, read_init_mosquitoes
-from environment.patch import Patch
-from environment.environment import Environment
-from data.result import Result
-from data.control import Control
+if __package__ in (None, ""):
+    # Run as a script: make the package importable from the repository root.
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-os.environ["OPENBLAS_MAIN_FREE"] = "1"
-
-
-config = read_config(*sys.argv[1:2])
-init_mosquito_file, control_file, folder_name = sys.argv[2:]
+from simulation.data.reading import read_config
+from simulation.simulation import run
 
-T = config["period"]
-dt = config["dt"]
-N = config["number_of_patches"]
-
-patches = [Patch(config["mating_rates"][i], config["migration_rates"][i], config["capacity"][i]) for i in range(N)]
-mosquitoes = read_init_mosquitoes(init_mosquito_file, config)
-mosquitoes = random.sample(mosquitoes, len(mosquitoes))
+os.environ["OPENBLAS_MAIN_FREE"] = "1"
 
-environment = Environment(mosquitoes, patches, dt)
-result = Result(N, T, dt, folder_name=folder_name)
-control = Control(N, T, dt)
 
-control.read(control_file)
-result.add_populations(environment.get_populations())
+# Usage: python main.py <config_file> <init_mosquito_file> <control_file> <folder_name> [--events <event_file>]
+args = sys.argv[1:]
+event_file = None
+if "--events" in args:
+    index = args.index("--events")
+    event_file = args[index + 1]
+    del args[index:index + 2]
+config = read_config(*args[0:1])
+init_mosquito_file, control_file, folder_name = args[1:]
 
 tic = time.time()
 
-while environment.time < T:
-
-    if environment.empty_queue():
-        #print(environment.time)
-        result.add_populations(environment.get_populations())
-        environment.add_sterile_mosquitoes(control, config)
-        environment.next_time()
-
-    mosquito = environment.get_mosquito()
-
-    mosquito, alive = environment.grow_old(mosquito, config)
-
-    if not alive:
-        continue
-
-    environment.mate(mosquito, config)
-    environment.migrate(mosquito)
+result = run(config, init_mosquito_file, control_file, folder_name=folder_name, event_file=event_file)
 
 result.write()
 result.draw()
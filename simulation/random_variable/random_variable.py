@@ -1,16 +1,54 @@
+import math
+
 import numpy as np
 
-def simulate(name, params):
+def simulate(name, params, size=None):
     match name:
         case "uniform":
             a = params[0]
             b = params[1]
-            return (b-a)*np.random.rand() + a
+            if size is None:
+                return (b-a)*np.random.rand() + a
+            return (b-a)*np.random.random(size) + a
+        case "geom":
+            return np.random.geometric(*params, size=size)
+        case "norm":
+            if size is None:
+                return max(np.random.normal(*params), 0.1)
+            return np.maximum(np.random.normal(*params, size=size), 0.1)
+        case "weibull":
+            if size is None:
+                return params[1]*(-np.log(np.random.rand()))**(1/params[0])
+            return params[1]*(-np.log(np.random.random(size)))**(1/params[0])
+        case "bernoulli":
+            return np.random.binomial(1, params[0], size=size)
+
+def survival(name, params, x):
+    """
+    Probability that a value drawn by :func:`simulate` is greater than or equal to ``x``.
+
+    :param name: Name of the distribution.
+    :type name: str
+    :param params: Parameters of the distribution.
+    :type params: list
+    :param x: Threshold, scalar or array.
+    :type x: float or np.ndarray
+    :return: Survival function evaluated at ``x``.
+    :rtype: float or np.ndarray
+    """
+    x = np.asarray(x, dtype=float)
+    match name:
+        case "uniform":
+            a = min(params)
+            b = max(params)
+            return np.clip((b - x) / (b - a), 0, 1)
         case "geom":
-            return np.random.geometric(*params)
+            return (1 - params[0]) ** (np.maximum(np.ceil(x), 1) - 1)
         case "norm":
-            return max(np.random.normal(*params), 0.1)
+            z = (x - params[0]) / (params[1] * np.sqrt(2))
+            tail = 0.5 * (1 - np.vectorize(math.erf)(z))
+            return np.where(x <= 0.1, 1.0, tail)
         case "weibull":
-            return params[1]*(-np.log(np.random.rand()))**(1/params[0])
+            return np.exp(-(np.maximum(x, 0) / params[1]) ** params[0])
         case "bernoulli":
-            return np.random.binomial(1, params[0]) 
\ No newline at end of file
+            return np.where(x <= 0, 1.0, np.where(x <= 1, params[0], 0.0))
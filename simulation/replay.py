@@ -0,0 +1,49 @@
+import sys
+import os
+import time
+
+import pandas as pd
+
+if __package__ in (None, ""):
+    # Run as a script: make the package importable from the repository root.
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulation.agents.mosquito import MOSQUITO_NAME
+from simulation.data.events import read_events, replay_populations, aggregate
+
+def replay(event_file, folder_name, resolution=1):
+    """
+    Rebuild the events and the populations of every mosquito type of a logged simulation at a given resolution.
+
+    The folder contains ``events.csv``, the number of each event in each patch and interval of ``resolution`` time
+    steps, and one CSV file per patch with the number of mosquitoes of each type (eggs, larvae and pupae by sex) at
+    the start of each interval.
+
+    :param event_file: Path of the event file.
+    :type event_file: str
+    :param folder_name: Name of the folder where the tables are saved.
+    :type folder_name: str
+    :param resolution: Number of time steps of each interval, defaults to 1.
+    :type resolution: int, optional
+    """
+    header, counts = read_events(event_file)
+    N = header["N"]
+    os.makedirs(folder_name, exist_ok=True)
+    aggregate(header, counts, resolution).to_csv(f"{folder_name}/events.csv")
+    populations = replay_populations(header, counts)[::resolution]
+    for i in range(N):
+        df = pd.DataFrame(populations[:, i], columns=MOSQUITO_NAME)
+        df["Time"] = [header["dt"] * resolution * k for k in range(len(df))]
+        df.to_csv(f"{folder_name}/{i:0{len(str(N - 1))}}.csv", index=False)
+
+if __name__ == "__main__":
+    # Usage: python replay.py <event_file> <folder_name> [<resolution>]
+    event_file, folder_name = sys.argv[1:3]
+    resolution = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+
+    tic = time.time()
+
+    replay(event_file, folder_name, resolution)
+
+    toc = time.time()
+    print(toc - tic)
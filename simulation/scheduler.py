@@ -0,0 +1,186 @@
+import time
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+from .data.control import Control
+
+# Features of a simulation the cost model is linear in.
+FEATURES = ["intercept", "time_steps", "capacity_steps", "patch_steps", "released"]
+
+class CostModel:
+    """
+    Linear model of the running time of a simulation, calibrated from recorded running times.
+
+    The features are the number of time steps, the number of time steps times the total capacity (the agents are
+    bounded by the capacities), times the number of patches, and the number of released sterile males.
+
+    :param coefficients: Seconds per unit of each feature of ``FEATURES``, defaults to rough values for one core.
+    :type coefficients: np.ndarray, optional
+    """
+
+    def __init__(self, coefficients=None):
+        """
+        Constructor.
+
+        :param coefficients: Seconds per unit of each feature of ``FEATURES``, defaults to rough values for one core.
+        :type coefficients: np.ndarray, optional
+        """
+        if coefficients is None:
+            coefficients = np.array([0.05, 1e-3, 5e-5, 1e-4, 0.])
+        self.__coefficients = np.asarray(coefficients, dtype=float)
+
+    @property
+    def coefficients(self):
+        """
+        Get the seconds per unit of each feature.
+
+        :return: Coefficients, indexed like ``FEATURES``.
+        :rtype: np.ndarray
+        """
+        return self.__coefficients.copy()
+
+    @staticmethod
+    def features(config, control, released=None):
+        """
+        Get the features of a simulation.
+
+        :param config: Configuration dictionary containing parameters for the simulation.
+        :type config: dict
+        :param control: Path to the CSV file containing the control strategy, the control matrix, or the control
+                        strategy itself.
+        :type control: str or np.ndarray or Control
+        :param released: Number of released sterile males of the control files already read, indexed by path,
+                         period, time step and number of patches, updated in place so that the jobs sharing a
+                         control file read it once, defaults to None (no reuse).
+        :type released: dict, optional
+        :return: Features, indexed like ``FEATURES``.
+        :rtype: np.ndarray
+        """
+        N = config["number_of_patches"]
+        key = (control, config["period"], config["dt"], N) if isinstance(control, str) else None
+        if released is not None and key in released:
+            total = released[key]
+        else:
+            control_strategy = Control.create(N, config["period"], config["dt"], control)
+            total = control_strategy.get_total_releases().sum()
+            if released is not None and key is not None:
+                released[key] = total
+        time_steps = config["period"] / config["dt"]
+        return np.array([1., time_steps, time_steps * sum(config["capacity"]), time_steps * N, total])
+
+    def predict(self, features):
+        """
+        Predict running times.
+
+        :param features: Features of one simulation, or of several ones in rows.
+        :type features: np.ndarray
+        :return: Predicted seconds, never below zero.
+        :rtype: float or np.ndarray
+        """
+        return np.maximum(np.asarray(features) @ self.__coefficients, 0)
+
+    def fit(self, features, seconds):
+        """
+        Calibrate the model on recorded running times.
+
+        The coefficients are fitted by least squares, each one being pulled towards its current value as much as by
+        one more record, so that features which do not vary between the records keep their current coefficients.
+
+        :param features: Features of the recorded simulations, one row per simulation.
+        :type features: np.ndarray
+        :param seconds: Recorded running times.
+        :type seconds: np.ndarray
+        """
+        features = np.asarray(features, dtype=float).reshape(-1, len(FEATURES))
+        seconds = np.asarray(seconds, dtype=float)
+        if not len(seconds):
+            return
+        # Penalty rows, in seconds: typical contribution of each feature away from its current coefficient.
+        scale = np.diag(np.maximum(np.abs(features).mean(axis=0), 1e-12))
+        a = np.concatenate([features, scale])
+        b = np.concatenate([seconds, scale @ self.__coefficients])
+        self.__coefficients = np.linalg.lstsq(a, b, rcond=None)[0]
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Create a model calibrated on the running times recorded in a CSV file, as written by ``run_jobs``.
+
+        :param filename: Path to the CSV file, with one column per feature and the column "seconds".
+        :type filename: str
+        :return: The calibrated model.
+        :rtype: CostModel
+        """
+        timings = pd.read_csv(filename)
+        model = cls()
+        model.fit(timings[FEATURES].values, timings["seconds"].values)
+        return model
+
+def run_timed(args):
+    """
+    Run a job and measure its running time.
+
+    :param args: Function, index of the job and arguments of the function.
+    :type args: tuple
+    :return: Index of the job, result of the function and running time in seconds.
+    :rtype: tuple
+    """
+    function, index, job = args
+    tic = time.time()
+    result = function(job)
+    return index, result, time.time() - tic
+
+def run_jobs(function, jobs, features, processes=None, model=None):
+    """
+    Run jobs in parallel, the ones predicted to be the longest first.
+
+    The jobs are handed one at a time to the first idle worker, so a long job started early runs while the short
+    ones are shared between the other workers, instead of delaying the end of the run.
+
+    :param function: Function run on each job, it must be defined at the top level of a module.
+    :type function: Callable
+    :param jobs: Arguments of the function for each job.
+    :type jobs: list
+    :param features: Features of each job, see ``CostModel.features``.
+    :type features: np.ndarray
+    :param processes: Number of worker processes, defaults to the number of CPUs.
+    :type processes: int, optional
+    :param model: Model predicting the running time of each job, defaults to an uncalibrated ``CostModel``.
+    :type model: CostModel, optional
+    :return: Result of each job, in the order of the jobs, and the features, predicted and actual running times
+             ("seconds") of each job.
+    :rtype: Tuple[list, pd.DataFrame]
+    """
+    if model is None:
+        model = CostModel()
+    features = np.asarray(features, dtype=float).reshape(len(jobs), len(FEATURES))
+    predicted = model.predict(features)
+    results = [None] * len(jobs)
+    seconds = np.zeros(len(jobs))
+    order = np.argsort(-predicted, kind="stable")
+    with Pool(processes) as pool:
+        for index, result, elapsed in pool.imap_unordered(run_timed, [(function, i, jobs[i]) for i in order]):
+            results[index] = result
+            seconds[index] = elapsed
+    timings = pd.DataFrame(features, columns=FEATURES)
+    timings["predicted"] = predicted
+    timings["seconds"] = seconds
+    return results, timings
+
+def ideal_makespan(seconds, processes):
+    """
+    Lower bound of the wall time of running jobs on a number of workers.
+
+    :param seconds: Running time of each job.
+    :type seconds: np.ndarray
+    :param processes: Number of workers.
+    :type processes: int
+    :return: The longest job or the total time shared evenly between the workers, whichever is longer.
+    :rtype: float
+    """
+    seconds = np.asarray(seconds, dtype=float)
+    if not len(seconds):
+        return 0.
+    return max(seconds.max(), seconds.sum() / processes)
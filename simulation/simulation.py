@@ -0,0 +1,214 @@
+import random
+
+import numpy as np
+
+from .data.reading import create_init_mosquitoes, init_mosquitoes_frame
+from .environment.patch import Patch
+from .environment.environment import Environment
+from .environment.batch import BatchEnvironment
+from .data.result import Result, COLUMN_NAMES
+from .data.control import Control
+from .data.stopping import read_stopping_rules, STERILE_MALE_COLUMN
+from .data.events import EventLog
+from .agents.mosquito import MOSQUITO_NAME
+
+def run(config, init_mosquitoes, control, folder_name=None, seed=None, stopping_rules=None, event_file=None):
+    """
+    Run one simulation.
+
+    :param config: Configuration dictionary containing parameters for the simulation.
+    :type config: dict
+    :param init_mosquitoes: Path to the CSV file containing the initial mosquitoes, or their numbers in each patch
+                            indexed by mosquito name. Sterile male adults are released as a cohort.
+    :type init_mosquitoes: str or dict or pd.DataFrame
+    :param control: Path to the CSV file containing the control strategy, the control matrix, or the control
+                    strategy itself.
+    :type control: str or np.ndarray or Control
+    :param folder_name: Name of the folder where results are saved, defaults to None (no folder).
+    :type folder_name: str, optional
+    :param seed: Seed of the random generators, defaults to None.
+    :type seed: int, optional
+    :param stopping_rules: Rules ending the simulation before the period, defaults to the rules of the "stopping"
+                           section of the configuration. Once a rule stops the simulation, it fills the remaining
+                           time steps, and only the released sterile males keep being simulated.
+    :type stopping_rules: list, optional
+    :param event_file: Path of the file where the events of each time step are logged, see ``data.events``,
+                       defaults to None (no log).
+    :type event_file: str, optional
+    :return: Result of the simulation.
+    :rtype: Result
+    """
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+
+    if stopping_rules is None:
+        stopping_rules = read_stopping_rules(config)
+
+    T = config["period"]
+    dt = config["dt"]
+    N = config["number_of_patches"]
+
+    environment, control_strategy = create_environment(config, init_mosquitoes, control)
+    result = Result(N, T, dt, folder_name=folder_name)
+    result.add_populations(environment.get_populations())
+    if event_file is not None:
+        # Released sterile males are tracked as cohorts, not as events.
+        populations = np.array(environment.get_populations())
+        populations[:, MOSQUITO_NAME.index("Sterile Male Adult")] -= environment.get_released()
+        environment.event_log = EventLog(event_file, N, dt, populations)
+
+    while environment.time < T:
+        environment.grow_old_mosquitoes(config)
+        if environment.event_log is not None:
+            environment.event_log.next_step()
+        environment.grow_old_sterile_mosquitoes()
+        result.add_populations(environment.get_populations())
+        if _stop(stopping_rules, result, control_strategy, environment.time):
+            _fast_forward(result, environment, control_strategy, config)
+            break
+        environment.add_sterile_mosquitoes(control_strategy, config)
+        environment.next_time()
+
+    if environment.event_log is not None:
+        environment.event_log.close()
+    return result
+
+def create_environment(config, init_mosquitoes, control):
+    """
+    Create the environment of a simulation at time 0 and its control strategy.
+
+    :param config: Configuration dictionary containing parameters for the simulation.
+    :type config: dict
+    :param init_mosquitoes: Path to the CSV file containing the initial mosquitoes, or their numbers in each patch
+                            indexed by mosquito name. Sterile male adults are released as a cohort.
+    :type init_mosquitoes: str or dict or pd.DataFrame
+    :param control: Path to the CSV file containing the control strategy, the control matrix, or the control
+                    strategy itself.
+    :type control: str or np.ndarray or Control
+    :return: The environment and the control strategy.
+    :rtype: Tuple[Environment, Control]
+    """
+    T = config["period"]
+    dt = config["dt"]
+    N = config["number_of_patches"]
+
+    patches = [Patch(config["mating_rates"][i], config["migration_rates"][i], config["capacity"][i]) for i in range(N)]
+    init_mosquitoes = init_mosquitoes_frame(init_mosquitoes)
+    mosquitoes = create_init_mosquitoes(init_mosquitoes, config)
+    mosquitoes = random.sample(mosquitoes, len(mosquitoes))
+
+    environment = Environment(mosquitoes, patches, dt)
+    control_strategy = Control.create(N, T, dt, control)
+    if "Sterile Male Adult" in init_mosquitoes:
+        environment.release_sterile_mosquitoes(init_mosquitoes["Sterile Male Adult"].values,
+                                               control_strategy.release_age, config)
+    return environment, control_strategy
+
+def _stop(stopping_rules, result, control, time):
+    """
+    Check the stopping rules and fill the remaining time steps with the first rule that stops the simulation.
+
+    :return: True if the simulation stops.
+    :rtype: bool
+    """
+    remaining_releases = control.remaining_releases(time)
+    for rule in stopping_rules:
+        if rule.should_stop(result.values, result.t, remaining_releases):
+            rule.fill(result.values, result.t)
+            return True
+    return False
+
+def _fast_forward(result, environment, control, config):
+    """
+    Simulate only the released sterile males until the end of the period, the other mosquitoes are not simulated.
+    """
+    for t in range(result.t, result.values.shape[1]):
+        environment.add_sterile_mosquitoes(control, config)
+        environment.next_time()
+        environment.grow_old_sterile_mosquitoes()
+        result.values[:, t, STERILE_MALE_COLUMN] = environment.get_released()
+
+def run_simulation(config, init_mosquitoes, control, seed=None, stopping_rules=None, cache=None):
+    """
+    Run one simulation in memory, without writing any file.
+
+    :param config: Configuration dictionary containing parameters for the simulation.
+    :type config: dict
+    :param init_mosquitoes: Path to the CSV file containing the initial mosquitoes, or their numbers in each patch
+                            indexed by mosquito name.
+    :type init_mosquitoes: str or dict or pd.DataFrame
+    :param control: Path to the CSV file containing the control strategy, the control matrix (one row per time step
+                    and one column per patch), or the control strategy itself.
+    :type control: str or np.ndarray or Control
+    :param seed: Seed of the random generators, defaults to None.
+    :type seed: int, optional
+    :param stopping_rules: Rules ending the simulation before the period, see ``run``.
+    :type stopping_rules: list, optional
+    :param cache: Cache returning the stored result of a simulation already run with the same inputs, defaults to
+                  None. Only seeded simulations without explicit stopping rules are cached.
+    :type cache: ResultCache, optional
+    :return: Populations of shape (number of patches, number of time steps, number of columns), the columns are
+             ``data.result.COLUMN_NAMES``.
+    :rtype: np.ndarray
+    """
+    control = Control.create(config["number_of_patches"], config["period"], config["dt"], control)
+    if cache is None or seed is None or stopping_rules is not None:
+        return run(config, init_mosquitoes, control, seed=seed, stopping_rules=stopping_rules).values
+
+    key = cache.key(config, init_mosquitoes, control, seed)
+    values = cache.get(key)
+    if values is None:
+        values = run(config, init_mosquitoes, control, seed=seed).values
+        cache.put(key, values)
+    return values
+
+def run_batch(config, init_mosquitoes, control, replicates, seed=None):
+    """
+    Run independent replicates of one simulation together, with array operations over all the replicates.
+
+    The replicates follow the rules of ``run``, see ``BatchEnvironment`` for the differences within a time step.
+    Stopping rules are not supported.
+
+    :param config: Configuration dictionary containing parameters for the simulation.
+    :type config: dict
+    :param init_mosquitoes: Path to the CSV file containing the initial mosquitoes, or their numbers in each patch
+                            indexed by mosquito name.
+    :type init_mosquitoes: str or dict or pd.DataFrame
+    :param control: Path to the CSV file containing the control strategy, the control matrix, or the control
+                    strategy itself.
+    :type control: str or np.ndarray or Control
+    :param replicates: Number of replicates.
+    :type replicates: int
+    :param seed: Seed of the random generators, defaults to None.
+    :type seed: int, optional
+    :return: Populations of shape (replicates, number of patches, number of time steps, number of columns).
+    :rtype: np.ndarray
+    """
+    if seed is not None:
+        np.random.seed(seed)
+
+    T = config["period"]
+    dt = config["dt"]
+    N = config["number_of_patches"]
+
+    init_mosquitoes = init_mosquitoes_frame(init_mosquitoes)
+    environment = BatchEnvironment(init_mosquitoes, config, replicates)
+    control_strategy = Control.create(N, T, dt, control)
+    if "Sterile Male Adult" in init_mosquitoes:
+        environment.release_sterile_mosquitoes(init_mosquitoes["Sterile Male Adult"].values,
+                                               control_strategy.release_age)
+
+    nt = Result(N, T, dt).values.shape[1]
+    result = np.zeros((replicates, N, nt, len(COLUMN_NAMES)))
+    result[:, :, 0] = environment.get_populations()
+    for k in range(1, nt):
+        # Same order as run: the first recorded step only repeats the initial populations.
+        if k > 1:
+            environment.step()
+        environment.grow_old_sterile_mosquitoes()
+        result[:, :, k] = environment.get_populations()
+        for numbers, age, lifespan_dist in control_strategy.get_release_events(environment.time):
+            environment.release_sterile_mosquitoes(numbers, age, lifespan_dist)
+        environment.next_time()
+    return result
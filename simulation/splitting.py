@@ -0,0 +1,170 @@
+import sys
+import os
+import random
+import time
+
+import numpy as np
+
+if __package__ in (None, ""):
+    # Run as a script: make the package importable from the repository root.
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulation.agents.mosquito import MOSQUITO_NAME
+from simulation.data.reading import read_config, init_mosquitoes_frame
+from simulation.simulation import create_environment
+
+os.environ["OPENBLAS_MAIN_FREE"] = "1"
+
+# Mosquito types of the wild population that can still take part in reproduction.
+FERTILE_TYPES = [j for j, name in enumerate(MOSQUITO_NAME) if not name.startswith("Sterile")]
+
+def fertile_population(environment, patch=None):
+    """
+    Get the fertile wild population of a patch or of the whole environment.
+
+    :param environment: The environment.
+    :type environment: Environment
+    :param patch: Index of the patch, defaults to None (all patches).
+    :type patch: int, optional
+    :return: Number of fertile wild mosquitoes.
+    :rtype: int
+    """
+    populations = np.array(environment.get_populations())[:, FERTILE_TYPES]
+    if patch is None:
+        return int(populations.sum())
+    return int(populations[patch].sum())
+
+def default_levels(population):
+    """
+    Default levels of the splitting: the population halved until it reaches 1, then 0.
+
+    :param population: Initial fertile wild population.
+    :type population: int
+    :return: Decreasing levels.
+    :rtype: list of int
+    """
+    return [population // 2 ** k for k in range(1, population.bit_length())] + [0]
+
+def step(environment, control, config):
+    """
+    Simulate one time step, in the same order as ``simulation.run``.
+
+    :param environment: The environment, modified in place.
+    :type environment: Environment
+    :param control: Control strategy.
+    :type control: Control
+    :param config: Configuration dictionary containing parameters for the simulation.
+    :type config: dict
+    """
+    environment.grow_old_mosquitoes(config)
+    environment.grow_old_sterile_mosquitoes()
+    environment.add_sterile_mosquitoes(control, config)
+    environment.next_time()
+
+def run_to_level(environment, control, config, level, patch=None):
+    """
+    Simulate until the fertile wild population goes down to a level or the end of the period.
+
+    :param environment: The environment, modified in place.
+    :type environment: Environment
+    :param control: Control strategy.
+    :type control: Control
+    :param config: Configuration dictionary containing parameters for the simulation.
+    :type config: dict
+    :param level: Level of the fertile wild population.
+    :type level: int
+    :param patch: Index of the patch, defaults to None (all patches).
+    :type patch: int, optional
+    :return: True if the level is reached before the end of the period.
+    :rtype: bool
+    """
+    while fertile_population(environment, patch) > level:
+        if environment.time >= config["period"]:
+            return False
+        step(environment, control, config)
+    return True
+
+def estimate_elimination_probability(config, init_mosquitoes, control, trajectories=100, levels=None, patch=None,
+                                     seed=None):
+    """
+    Estimate the probability that the fertile wild population is eliminated by the end of the period.
+
+    The estimate uses fixed-effort multilevel splitting: the elimination is reached through decreasing levels of
+    the fertile wild population, and at each level ``trajectories`` simulations start from copies of the states that
+    reached the previous level, spread evenly among them. The simulations of the first level start from independent
+    initial states, since the fates of the initial mosquitoes are drawn when they are created. The probability of
+    reaching each level from the previous one is the fraction of simulations reaching it before the end of the
+    period, and the estimate is their product. Its variance is the usual approximation for independent levels,
+    P² Σ (1 - p_k) / (n p_k).
+
+    :param config: Configuration dictionary containing parameters for the simulation.
+    :type config: dict
+    :param init_mosquitoes: Path to the CSV file containing the initial mosquitoes, or their numbers in each patch
+                            indexed by mosquito name.
+    :type init_mosquitoes: str or dict or pd.DataFrame
+    :param control: Path to the CSV file containing the control strategy, or the control matrix.
+    :type control: str or np.ndarray
+    :param trajectories: Number of simulations at each level, defaults to 100.
+    :type trajectories: int, optional
+    :param levels: Decreasing levels of the fertile wild population ending with 0, defaults to ``default_levels``
+                   of the initial population.
+    :type levels: list of int, optional
+    :param patch: Index of the patch whose elimination is estimated, defaults to None (all patches).
+    :type patch: int, optional
+    :param seed: Seed of the random generators, defaults to None.
+    :type seed: int, optional
+    :return: Estimate, its variance and the probability of reaching each level from the previous one.
+    :rtype: Tuple[float, float, list of float]
+    :raises ValueError: If there is no fertile wild mosquito at the start, in the patch when one is given: a patch
+                        colonized later by migrants would otherwise be eliminated from the start.
+    """
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+
+    init_mosquitoes = init_mosquitoes_frame(init_mosquitoes)
+    environment, control_strategy = create_environment(config, init_mosquitoes, control)
+    population = fertile_population(environment, patch)
+    if population == 0:
+        raise ValueError("No fertile wild mosquito at the start" + ("" if patch is None else f" in patch {patch}"))
+    if levels is None:
+        levels = default_levels(population)
+
+    states = []
+    probabilities = []
+    for level in levels:
+        reached = []
+        for i in range(trajectories):
+            if states:
+                trajectory = states[i % len(states)].clone()
+            elif i == 0:
+                trajectory = environment
+            else:
+                trajectory = create_environment(config, init_mosquitoes, control)[0]
+            if run_to_level(trajectory, control_strategy, config, level, patch):
+                reached.append(trajectory)
+        probabilities.append(len(reached) / trajectories)
+        if not reached:
+            return 0., 0., probabilities
+        states = reached
+
+    estimate = float(np.prod(probabilities))
+    variance = estimate ** 2 * sum((1 - p) / (trajectories * p) for p in probabilities)
+    return estimate, variance, probabilities
+
+if __name__ == "__main__":
+    # Usage: python splitting.py <config_file> <init_mosquito_file> <control_file> <trajectories> [<patch>]
+    config = read_config(sys.argv[1])
+    init_mosquito_file, control_file = sys.argv[2:4]
+    trajectories = int(sys.argv[4])
+    patch = int(sys.argv[5]) if len(sys.argv) > 5 else None
+
+    tic = time.time()
+
+    estimate, variance, probabilities = estimate_elimination_probability(config, init_mosquito_file, control_file,
+                                                                         trajectories, patch=patch)
+    print(f"Elimination probability: {estimate:.3e} (standard error {np.sqrt(variance):.3e})")
+    print("Level probabilities:", " ".join(f"{p:.3f}" for p in probabilities))
+
+    toc = time.time()
+    print(toc - tic)
@@ -0,0 +1,204 @@
+import sys
+import os
+import copy
+import time
+import pickle
+
+import numpy as np
+
+if __package__ in (None, ""):
+    # Run as a script: make the package importable from the repository root.
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulation.agents.cohort import SterileCohorts
+from simulation.data.control import Control
+from simulation.data.reading import read_config, init_mosquitoes_frame, populations_to_init_mosquitoes
+from simulation.data.result import Result, COLUMN_NAMES
+from simulation.data.stopping import STERILE_MALE_COLUMN
+from simulation.simulation import run
+
+os.environ["OPENBLAS_MAIN_FREE"] = "1"
+
+# Columns of the wild mosquitoes predicted by the model, in the order of scripts/process_dataset.py.
+WILD_COLUMNS = [j for j in range(len(COLUMN_NAMES)) if j != STERILE_MALE_COLUMN]
+
+class Surrogate:
+    """
+    Forecast populations with a model trained on simulation outputs, as in the notebooks.
+
+    The model predicts the wild populations of the next time step from the last ``lookback`` states. A state is the
+    7 wild columns of every patch followed by the sterile males of every patch, scaled by the scaler fitted on the
+    training set (see ``scripts/process_dataset.py``). The sterile males are not predicted, they follow the release
+    cohorts of the control strategy. The first ``lookback`` time steps are simulated by the agent-based model.
+
+    :param model: Model mapping scaled states of shape (1, lookback, features), or (1, features) when lookback is 1,
+                  to the scaled wild populations of the next time step.
+    :type model: keras.Model
+    :param scaler: Scaler of the states, e.g. a fitted ``sklearn.preprocessing.MinMaxScaler``.
+    :type scaler: sklearn.base.TransformerMixin
+    """
+
+    def __init__(self, model, scaler):
+        """
+        Constructor.
+
+        :param model: Model mapping scaled states to the scaled wild populations of the next time step.
+        :type model: keras.Model
+        :param scaler: Scaler of the states, e.g. a fitted ``sklearn.preprocessing.MinMaxScaler``.
+        :type scaler: sklearn.base.TransformerMixin
+        """
+        self.__model = model
+        self.__scaler = scaler
+        input_shape = model.input_shape
+        self.__sequence = len(input_shape) == 3
+        self.__lookback = input_shape[1] if self.__sequence else 1
+
+    @classmethod
+    def load(cls, model_file, scaler_file):
+        """
+        Load a Keras model and its pickled scaler.
+
+        :param model_file: Path to the saved Keras model.
+        :type model_file: str
+        :param scaler_file: Path to the pickled scaler.
+        :type scaler_file: str
+        :return: The surrogate.
+        :rtype: Surrogate
+        """
+        try:
+            from keras.saving import load_model
+        except ImportError as error:
+            raise ImportError("The surrogate needs keras, install it with `pip install keras`") from error
+        with open(scaler_file, "rb") as f:
+            scaler = pickle.load(f)
+        return cls(load_model(model_file), scaler)
+
+    @property
+    def lookback(self):
+        """
+        Get the number of past states the model uses.
+
+        :return: Number of past states.
+        :rtype: int
+        """
+        return self.__lookback
+
+    def __predict(self, states):
+        """
+        Predict the wild populations of the next time step.
+
+        :param states: Last ``lookback`` states, of shape (lookback, N, number of columns).
+        :type states: np.ndarray
+        :return: Wild populations, of shape (N, number of wild columns).
+        :rtype: np.ndarray
+        """
+        N = states.shape[1]
+        features = np.concatenate([states[:, :, WILD_COLUMNS].reshape(len(states), -1),
+                                   states[:, :, STERILE_MALE_COLUMN]], axis=1)
+        x = self.__scaler.transform(features)
+        x = x[None] if self.__sequence else x[-1:]
+        y = np.asarray(self.__model(x, training=False)).reshape(1, -1)
+        y = np.concatenate([y, np.zeros((1, features.shape[1] - y.shape[1]))], axis=1)
+        y = self.__scaler.inverse_transform(y)[:, :N * len(WILD_COLUMNS)]
+        return np.maximum(y.reshape(N, len(WILD_COLUMNS)), 0)
+
+    def __simulate(self, config, populations, control, k, length, seed):
+        """
+        Simulate with the agent-based model, starting from given populations at a given row of the result.
+
+        :return: Populations of shape (N, length, number of columns), starting with the given ones.
+        :rtype: np.ndarray
+        """
+        config = copy.deepcopy(config)
+        config["period"] = length * config["dt"]
+        # Row k of a result is recorded at time (k - 1) * dt, and the releases of that time are effective from the
+        # next row on.
+        control = control.window((k - 1) * config["dt"], config["period"])
+        values = run(config, populations_to_init_mosquitoes(populations), control, seed=seed, stopping_rules=[]).values
+        # The first two rows of a result are both the initial populations.
+        return values[:, 1:]
+
+    def forecast(self, config, init_mosquitoes, control, seed=None, anchor_every=None):
+        """
+        Forecast the populations over the period of the configuration.
+
+        :param config: Configuration dictionary containing parameters for the simulation.
+        :type config: dict
+        :param init_mosquitoes: Path to the CSV file containing the initial mosquitoes, or their numbers.
+        :type init_mosquitoes: str or dict or pd.DataFrame
+        :param control: Path to the CSV file containing the control strategy, the control matrix, or the control
+                        strategy itself.
+        :type control: str or np.ndarray or Control
+        :param seed: Seed of the random generators, defaults to None.
+        :type seed: int, optional
+        :param anchor_every: Every ``anchor_every`` forecast time steps, the last ``lookback`` states are replaced by
+                             an agent-based simulation starting from the forecast, defaults to None (never).
+        :type anchor_every: int, optional
+        :return: Populations of shape (N, nt, number of columns), like ``Result.values``.
+        :rtype: np.ndarray
+        """
+        if seed is not None:
+            np.random.seed(seed)
+        T = config["period"]
+        dt = config["dt"]
+        N = config["number_of_patches"]
+        control_strategy = Control.create(N, T, dt, control)
+        init_mosquitoes = init_mosquitoes_frame(init_mosquitoes)
+        values = np.zeros(Result(N, T, dt).values.shape)
+        nt = values.shape[1]
+        lookback = min(self.__lookback, nt)
+        warm_up = copy.deepcopy(config)
+        warm_up["period"] = (lookback - 1) * dt
+        values[:, :lookback] = run(warm_up, init_mosquitoes, control_strategy.window(0, warm_up["period"]), seed=seed,
+                                   stopping_rules=[]).values
+
+        # Released sterile males, in the same order as the agent-based simulation: aged, recorded, then released.
+        cohorts = SterileCohorts(config["migration_rates"], config["sterile male adult"]["lifespan"])
+        if "Sterile Male Adult" in init_mosquitoes:
+            cohorts.add(init_mosquitoes["Sterile Male Adult"].values, control_strategy.release_age)
+        sterile = np.zeros((N, nt))
+        sterile[:, 0] = cohorts.get_numbers()
+        for k in range(1, nt):
+            cohorts.grow_old(dt)
+            sterile[:, k] = cohorts.get_numbers()
+            for numbers, age, lifespan_dist in control_strategy.get_release_events((k - 1) * dt):
+                cohorts.add(numbers, age, lifespan_dist)
+
+        values[:, lookback:, STERILE_MALE_COLUMN] = sterile[:, lookback:]
+
+        k = lookback
+        since_anchor = 0
+        while k < nt:
+            if anchor_every is not None and since_anchor == anchor_every:
+                # Replace the last state and the following ones by an agent-based simulation starting from it.
+                length = min(max(lookback, 2), nt - k + 1)
+                anchor_seed = None if seed is None else seed + k
+                anchor = self.__simulate(config, values[:, k - 1], control_strategy, k - 1, length, anchor_seed)
+                values[:, k - 1:k - 1 + length, WILD_COLUMNS] = anchor[:, :, WILD_COLUMNS]
+                k += length - 1
+                since_anchor = 0
+                continue
+            values[:, k, WILD_COLUMNS] = self.__predict(np.moveaxis(values[:, k - lookback:k], 1, 0))
+            k += 1
+            since_anchor += 1
+        return values
+
+if __name__ == "__main__":
+    # Usage: python surrogate.py <model_file> <scaler_file> <config_file> <init_mosquito_file> <control_file>
+    #                            <folder_name> [<anchor_every>]
+    model_file, scaler_file = sys.argv[1:3]
+    config = read_config(sys.argv[3])
+    init_mosquito_file, control_file, folder_name = sys.argv[4:7]
+    anchor_every = int(sys.argv[7]) if len(sys.argv) > 7 else None
+
+    surrogate = Surrogate.load(model_file, scaler_file)
+
+    tic = time.time()
+
+    result = Result(config["number_of_patches"], config["period"], config["dt"], folder_name=folder_name)
+    result.values = surrogate.forecast(config, init_mosquito_file, control_file, anchor_every=anchor_every)
+    result.write()
+    result.draw()
+
+    toc = time.time()
+    print(toc - tic)
@@ -0,0 +1,274 @@
+import sys
+import os
+import copy
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+if __package__ in (None, ""):
+    # Run as a script: make the package importable from the repository root.
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulation.data.reading import read_config
+from simulation.data.result import FERTILE_COLUMNS
+from simulation.simulation import run
+from simulation.scheduler import CostModel, run_jobs, ideal_makespan
+
+os.environ["OPENBLAS_MAIN_FREE"] = "1"
+
+def set_config_value(config, path, value):
+    """
+    Set a value of the configuration given its path, keys and list indices separated by dots.
+
+    If the path leads to a list, every element of the list is set, e.g. "capacity" sets the capacity of every patch
+    while "capacity.0" only sets the capacity of the first patch.
+
+    :param config: Configuration dictionary, modified in place.
+    :type config: dict
+    :param path: Path of the value, e.g. "sterile male adult.lifespan.params.1".
+    :type path: str
+    :param value: The new value.
+    :type value: float
+    """
+    keys = [int(key) if key.isdigit() else key for key in path.split(".")]
+    node = config
+    for key in keys[:-1]:
+        node = node[key]
+    if isinstance(node[keys[-1]], list):
+        node[keys[-1]] = [value] * len(node[keys[-1]])
+    else:
+        node[keys[-1]] = value
+
+def latin_hypercube(n, d, rng):
+    """
+    Draw a Latin hypercube sample in the unit cube.
+
+    :param n: Number of points.
+    :type n: int
+    :param d: Number of dimensions.
+    :type d: int
+    :param rng: Random generator.
+    :type rng: np.random.Generator
+    :return: Array of shape (n, d), each column has exactly one point in each of the n strata.
+    :rtype: np.ndarray
+    """
+    strata = np.argsort(rng.random((n, d)), axis=0)
+    return (strata + rng.random((n, d))) / n
+
+def create_design(parameters, design, samples, rng):
+    """
+    Create the design of a sweep.
+
+    The "lhs" design is a Latin hypercube of ``samples`` points. The "sobol" design follows Saltelli's scheme for
+    variance-based sensitivity indices: two independent Latin hypercubes A and B of ``samples`` points and, for
+    each parameter i, the matrix AB_i equal to A with its column i taken from B, that is samples * (d + 2) points.
+
+    :param parameters: Range [low, high] of each swept parameter, indexed by configuration path.
+    :type parameters: dict
+    :param design: "lhs" or "sobol".
+    :type design: str
+    :param samples: Number of base samples.
+    :type samples: int
+    :param rng: Random generator.
+    :type rng: np.random.Generator
+    :return: One row per point with its block ("lhs", "A", "B" or "AB<i>"), its base sample and the parameters.
+    :rtype: pd.DataFrame
+    """
+    names = list(parameters)
+    d = len(names)
+    match design:
+        case "lhs":
+            blocks = {"lhs": latin_hypercube(samples, d, rng)}
+        case "sobol":
+            units = latin_hypercube(samples, 2 * d, rng)
+            A, B = units[:, :d], units[:, d:]
+            blocks = {"A": A, "B": B}
+            for i in range(d):
+                AB = A.copy()
+                AB[:, i] = B[:, i]
+                blocks[f"AB{i}"] = AB
+        case _:
+            raise ValueError(f"Unknown design {design}")
+
+    low = np.array([parameters[name][0] for name in names])
+    high = np.array([parameters[name][1] for name in names])
+    frames = []
+    for block, units in blocks.items():
+        df = pd.DataFrame(low + units * (high - low), columns=names)
+        df.insert(0, "sample", range(samples))
+        df.insert(0, "block", block)
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+def sobol_indices(design, outputs, names):
+    """
+    Estimate first-order and total Sobol indices from the outputs of a "sobol" design.
+
+    The first-order indices use Saltelli's 2010 estimator and the total indices Jansen's estimator.
+
+    :param design: Design as returned by ``create_design``.
+    :type design: pd.DataFrame
+    :param outputs: Scalar output of each point of the design.
+    :type outputs: np.ndarray
+    :param names: Names of the swept parameters.
+    :type names: list of str
+    :return: First-order ("S1") and total ("ST") index of each parameter.
+    :rtype: pd.DataFrame
+    """
+    outputs = np.asarray(outputs, dtype=float)
+    f = {block: outputs[(design["block"] == block).values] for block in design["block"].unique()}
+    variance = np.var(np.concatenate([f["A"], f["B"]]))
+    if variance == 0:
+        variance = np.nan
+    indices = []
+    for i, name in enumerate(names):
+        f_AB = f[f"AB{i}"]
+        indices.append({"parameter": name,
+                        "S1": np.mean(f["B"] * (f_AB - f["A"])) / variance,
+                        "ST": 0.5 * np.mean((f["A"] - f_AB) ** 2) / variance})
+    return pd.DataFrame(indices)
+
+def final_wild_population(values):
+    """
+    Default output of a sweep: the fertile wild population of all patches at the end of the period.
+
+    :param values: Populations of a simulation.
+    :type values: np.ndarray
+    :return: Final fertile wild population.
+    :rtype: float
+    """
+    return float(values[:, -1, FERTILE_COLUMNS].sum())
+
+def run_point(args):
+    """
+    Run one replicate of one point of a sweep and save its populations.
+
+    :param args: Configuration, initial mosquitoes, control, seed and path of the saved populations.
+    :type args: tuple
+    :return: Path of the saved populations.
+    :rtype: str
+    """
+    config, init_mosquitoes, control, seed, path = args
+    values = run(config, init_mosquitoes, control, seed=seed).values
+    # Write then rename, so an interrupted sweep never leaves a partial run behind.
+    with open(f"{path}.tmp", "wb") as f:
+        np.save(f, values)
+    os.replace(f"{path}.tmp", path)
+    return path
+
+def run_sweep(config, init_mosquitoes, control, sweep, folder_name, processes=None, output=final_wild_population):
+    """
+    Run a parameter sweep, resuming from the runs already saved in the folder.
+
+    The sweep dictionary has the keys ``parameters`` (range [low, high] of each swept parameter, indexed by
+    configuration path), ``design`` ("lhs" or "sobol"), ``samples`` (number of base samples), and optionally
+    ``replicates`` (simulations per point, defaults to 1) and ``seed``. The replicate r of every point built from the
+    same base sample shares its seed, so differences between points are not blurred by the simulation noise.
+
+    Simulations are scheduled longest first according to a ``scheduler.CostModel``, calibrated on the running
+    times already recorded in the folder, or in the file given by the optional key ``timings`` of the sweep.
+
+    The folder contains ``design.csv``, ``seed.txt`` with the base seed of the simulations (drawn at random without
+    ``seed``), one ``runs/<point>_<replicate>.npy`` file per simulation, ``outputs.csv`` with the mean output of each
+    point over its replicates, ``timings.csv`` with the features, predicted and actual running time of each
+    simulation and, for a "sobol" design, ``sensitivity.csv``.
+
+    :param config: Configuration dictionary containing parameters for the simulation.
+    :type config: dict
+    :param init_mosquitoes: Path to the CSV file containing the initial mosquitoes, or their numbers.
+    :type init_mosquitoes: str or dict
+    :param control: Path to the CSV file containing the control strategy, or the control matrix.
+    :type control: str or np.ndarray
+    :param sweep: Description of the sweep.
+    :type sweep: dict
+    :param folder_name: Name of the folder where the sweep is saved.
+    :type folder_name: str
+    :param processes: Number of worker processes, defaults to the number of CPUs.
+    :type processes: int, optional
+    :param output: Scalar output of a simulation, defaults to ``final_wild_population``.
+    :type output: Callable[[np.ndarray], float], optional
+    :return: Design with the output of each point.
+    :rtype: pd.DataFrame
+    :raises ValueError: If runs were saved in the folder without their base seed and the sweep has no seed.
+    """
+    names = list(sweep["parameters"])
+    replicates = sweep.get("replicates", 1)
+    os.makedirs(f"{folder_name}/runs", exist_ok=True)
+
+    design_file = f"{folder_name}/design.csv"
+    if os.path.exists(design_file):
+        design = pd.read_csv(design_file, index_col="point")
+    else:
+        rng = np.random.default_rng(sweep.get("seed"))
+        design = create_design(sweep["parameters"], sweep["design"], sweep["samples"], rng)
+        design.to_csv(design_file, index_label="point")
+
+    # The base seed is saved with the design, so that a resumed sweep keeps the common random numbers of its points.
+    seed_file = f"{folder_name}/seed.txt"
+    if os.path.exists(seed_file):
+        with open(seed_file) as f:
+            base_seed = int(f.read())
+    elif "seed" in sweep or not os.listdir(f"{folder_name}/runs"):
+        base_seed = int(np.random.SeedSequence(sweep.get("seed")).generate_state(1)[0])
+        with open(seed_file, "w") as f:
+            f.write(str(base_seed))
+    else:
+        raise ValueError(f"The base seed of the runs in {folder_name} is unknown, "
+                         f"give the seed of the sweep to resume it")
+
+    timings_file = f"{folder_name}/timings.csv"
+    if "timings" in sweep:
+        model = CostModel.load(sweep["timings"])
+    elif os.path.exists(timings_file):
+        model = CostModel.load(timings_file)
+    else:
+        model = CostModel()
+
+    jobs = []
+    features = []
+    released = {}
+    for point, row in design.iterrows():
+        point_config = copy.deepcopy(config)
+        for name in names:
+            set_config_value(point_config, name, float(row[name]))
+        for replicate in range(replicates):
+            path = f"{folder_name}/runs/{point}_{replicate}.npy"
+            if not os.path.exists(path):
+                seed = int(np.random.SeedSequence([base_seed, int(row["sample"]), replicate]).generate_state(1)[0])
+                jobs.append((point_config, init_mosquitoes, control, seed, path))
+                features.append(CostModel.features(point_config, control, released))
+
+    if jobs:
+        _, timings = run_jobs(run_point, jobs, features, processes, model)
+        timings.insert(0, "run", [os.path.basename(job[-1])[:-len(".npy")] for job in jobs])
+        timings.to_csv(timings_file, mode="a", header=not os.path.exists(timings_file), index=False)
+
+    design["output"] = [np.mean([output(np.load(f"{folder_name}/runs/{point}_{replicate}.npy"))
+                                 for replicate in range(replicates)]) for point in design.index]
+    design.to_csv(f"{folder_name}/outputs.csv", index_label="point")
+    if set(design["block"]) != {"lhs"}:
+        sobol_indices(design, design["output"].values, names).to_csv(f"{folder_name}/sensitivity.csv", index=False)
+    return design
+
+if __name__ == "__main__":
+    config = read_config(sys.argv[1])
+    init_mosquito_file, control_file, sweep_file, folder_name = sys.argv[2:6]
+    processes = int(sys.argv[6]) if len(sys.argv) > 6 else None
+    with open(sweep_file) as f:
+        sweep = json.load(f)
+
+    timings_file = f"{folder_name}/timings.csv"
+    recorded = len(pd.read_csv(timings_file)) if os.path.exists(timings_file) else 0
+
+    tic = time.time()
+
+    run_sweep(config, init_mosquito_file, control_file, sweep, folder_name, processes)
+
+    toc = time.time()
+    if os.path.exists(timings_file):
+        timings = pd.read_csv(timings_file).iloc[recorded:]
+        print(f"Predicted {timings['predicted'].sum():.1f} s, actual {timings['seconds'].sum():.1f} s of simulation, "
+              f"ideal makespan {ideal_makespan(timings['seconds'], processes or os.cpu_count()):.1f} s")
+    print(toc - tic)
@@ -0,0 +1,3 @@
+# Version of the simulation engine, to be increased whenever a change of the engine changes the results of a
+# simulation for the same inputs and seed. It is part of the keys of the result cache.
+ENGINE_VERSION = 2
@@ -0,0 +1,113 @@
+import sys
+import os
+import json
+import time
+import socketserver
+import traceback
+
+if __package__ in (None, ""):
+    # Run as a script: make the package importable from the repository root.
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulation.data.reading import read_config
+from simulation.simulation import run_simulation
+from simulation.data.cache import ResultCache
+
+os.environ["OPENBLAS_MAIN_FREE"] = "1"
+
+def process_job(line, default_config=None, cache=None):
+    """
+    Run the simulation described by a JSON job and build the JSON answer.
+
+    A job is an object with the keys ``config`` (optional if the worker has a default configuration),
+    ``init_mosquitoes`` (numbers of mosquitoes in each patch indexed by mosquito name), ``control``
+    (control matrix, one row per time step and one column per patch), and optionally ``seed`` and ``id``.
+
+    :param line: JSON job.
+    :type line: str
+    :param default_config: Configuration used when the job does not carry one, defaults to None.
+    :type default_config: dict, optional
+    :param cache: Cache of the results of seeded jobs, defaults to None.
+    :type cache: ResultCache, optional
+    :return: JSON answer, with the populations of shape (N, nt, number of columns) or an error message.
+    :rtype: str
+    """
+    job_id = None
+    try:
+        job = json.loads(line)
+        job_id = job.get("id")
+        config = job.get("config", default_config)
+        if config is None:
+            raise ValueError("The job has no config and the worker has no default config")
+        tic = time.time()
+        values = run_simulation(config, job["init_mosquitoes"], job["control"], seed=job.get("seed"), cache=cache)
+        toc = time.time()
+        answer = {"id": job_id, "result": values.tolist(), "time": toc - tic}
+    except Exception as error:
+        answer = {"id": job_id, "error": f"{type(error).__name__}: {error}", "traceback": traceback.format_exc()}
+    return json.dumps(answer)
+
+def serve_stream(input_stream, output_stream, default_config=None, cache=None):
+    """
+    Process the jobs of a stream, one JSON job per line, and write one JSON answer per line.
+
+    :param input_stream: Stream the jobs are read from.
+    :type input_stream: io.TextIOBase
+    :param output_stream: Stream the answers are written to.
+    :type output_stream: io.TextIOBase
+    :param default_config: Configuration used when a job does not carry one, defaults to None.
+    :type default_config: dict, optional
+    :param cache: Cache of the results of seeded jobs, defaults to None.
+    :type cache: ResultCache, optional
+    """
+    for line in input_stream:
+        if not line.strip():
+            continue
+        output_stream.write(process_job(line, default_config, cache) + "\n")
+        output_stream.flush()
+
+def serve_socket(path, default_config=None, cache=None):
+    """
+    Listen on a Unix socket, each connection sends JSON jobs and receives JSON answers, one per line.
+
+    Connections are handled one after the other since the simulations share the global random generators.
+
+    :param path: Path of the socket.
+    :type path: str
+    :param default_config: Configuration used when a job does not carry one, defaults to None.
+    :type default_config: dict, optional
+    :param cache: Cache of the results of seeded jobs, defaults to None.
+    :type cache: ResultCache, optional
+    """
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                self.wfile.write((process_job(line.decode(), default_config, cache) + "\n").encode())
+                self.wfile.flush()
+
+    if os.path.exists(path):
+        os.remove(path)
+    with socketserver.UnixStreamServer(path, Handler) as server:
+        try:
+            server.serve_forever()
+        finally:
+            os.remove(path)
+
+if __name__ == "__main__":
+    # Usage: python worker.py [<config_file>] [--socket <path>] [--cache <folder>]
+    args = sys.argv[1:]
+    options = {}
+    for option in ["--socket", "--cache"]:
+        if option in args:
+            index = args.index(option)
+            options[option] = args[index + 1]
+            del args[index:index + 2]
+    default_config = read_config(args[0]) if args else None
+    cache = ResultCache(options["--cache"]) if "--cache" in options else None
+
+    if "--socket" not in options:
+        serve_stream(sys.stdin, sys.stdout, default_config, cache)
+    else:
+        serve_socket(options["--socket"], default_config, cache)